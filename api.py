@@ -0,0 +1,317 @@
+# JSON API, mirroring the listing, detail and search pages:
+#
+#   GET /api/v1/venues, /api/v1/artists, /api/v1/shows      ?cursor= &per_page=
+#   GET /api/v1/venues/<id>, /api/v1/artists/<id>
+#   GET /api/v1/venues/search, /api/v1/artists/search      ?q=
+#   GET /api/v1/venues/genres, /api/v1/artists/genres      genre counts
+#   DELETE /api/v1/venues, /api/v1/artists                  {"ids": [...]}
+#
+# Listings, searches and genre counts take ?genre=Jazz&genre=Blues to keep the
+# venues or artists having all of these genres (see genres.py).
+#
+# Every route takes ?fields=id,name to select the fields it returns; only the
+# corresponding columns are queried (detail shows are only loaded when
+# upcoming_shows or past_shows are asked for). Responses are serialized with
+# orjson when it is installed.
+#
+# Listings and searches return num_upcoming_shows, the counters of counters.py,
+# which count a show which has started as upcoming until the next rollover;
+# details return upcoming_shows_count, counted when they are read.
+import datetime
+import json
+from collections import OrderedDict
+
+from flask import Blueprint, abort, current_app, request
+
+from conditional import conditional
+from counters import num_upcoming_shows
+from deletion import delete_by_ids, parse_ids
+from genres import facets_data, genre_facets, requested_genres
+from listings import (
+    venues_listing_query,
+    artists_listing_query,
+    shows_listing_query,
+    VENUE_LISTING_KEYS,
+    ARTIST_LISTING_KEYS,
+    SHOW_LISTING_KEYS,
+)
+from loaders import (
+    venue_detail_query,
+    artist_detail_query,
+    venue_shows_query,
+    artist_shows_query,
+    VENUE_DETAIL_COLUMNS,
+    ARTIST_DETAIL_COLUMNS,
+)
+from models import Venue, Artist
+from pagination import page_query, make_page, get_page_size, InvalidCursor
+from search import search_by_name
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+SHOW_LIST_FIELDS = ("upcoming_shows", "past_shows")
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_json_default, separators=(",", ":"))
+
+
+def json_response(data, status=200):
+    return current_app.response_class(
+        dumps(data), status=status, mimetype="application/json"
+    )
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return json_response({"error": error.description}, error.code)
+
+
+def _available_fields(query, *columns):
+    # Fields a query can return: its own columns, then any other `columns` of
+    # the tables it selects from.
+    fields = OrderedDict((d["name"], d["expr"]) for d in query.column_descriptions)
+    for column in columns:
+        fields.setdefault(column.key, column)
+    return fields
+
+
+def requested_fields(available, default, args=None):
+    if args is None:
+        args = request.args
+    fields = args.get("fields", "")
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names:
+        return list(default)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        abort(
+            400,
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}.",
+        )
+    return names
+
+
+def _project(query, available, names, keys=()):
+    # Narrows `query` to the columns of `names`, plus the keys the rows must
+    # still expose (e.g. for pagination).
+    columns = [available[name] for name in names]
+    columns.extend(key for key in keys if key.key not in names)
+    return query.with_entities(*columns)
+
+
+def _row_dict(row, names):
+    return {name: getattr(row, name) for name in names}
+
+
+# Each route is split in two halves, so that asgi.py can run the same queries
+# asynchronously: the plan builds the queries of a request, and the data turns
+# their rows into the response body.
+
+
+def listing_plan(query, keys, *columns, args=None):
+    if args is None:
+        args = request.args
+    available = _available_fields(query, *columns)
+    default = [d["name"] for d in query.column_descriptions]
+    names = requested_fields(available, default, args)
+    try:
+        page = page_query(
+            _project(query, available, names, keys),
+            keys,
+            cursor=args.get("cursor"),
+            page_size=get_page_size(args),
+        )
+    except InvalidCursor:
+        abort(400, "Invalid cursor.")
+    return page, names
+
+
+def listing_data(page, names, rows):
+    page = make_page(page, rows)
+    return {
+        "data": [_row_dict(row, names) for row in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
+def _listing(query, keys, *columns):
+    page, names = listing_plan(query, keys, *columns)
+    return json_response(listing_data(page, names, page.query.all()))
+
+
+def detail_plan(entity_id, detail_query, shows_query, args=None):
+    # The query of the entity's row, and of its shows when they are asked for
+    # (None otherwise).
+    nowtime = datetime.datetime.utcnow()
+    query = detail_query(entity_id, nowtime)
+    available = _available_fields(query)
+    default = list(available) + list(SHOW_LIST_FIELDS)
+    for name in SHOW_LIST_FIELDS:
+        available[name] = None
+    names = requested_fields(available, default, args)
+    column_names = [name for name in names if name not in SHOW_LIST_FIELDS]
+
+    # The id is always fetched, to tell a missing entity from an empty row.
+    row_query = _project(query, available, column_names, [available["id"]])
+    shows = None
+    if any(name in SHOW_LIST_FIELDS for name in names):
+        shows = shows_query(entity_id, nowtime)
+    return row_query, shows, names
+
+
+def detail_data(names, row, show_rows=None):
+    if row is None:
+        abort(404, "Not found.")
+    data = _row_dict(row, [name for name in names if name not in SHOW_LIST_FIELDS])
+    if show_rows is not None:
+        shows = {"upcoming_shows": [], "past_shows": []}
+        for show in show_rows:
+            show_d = show._asdict()
+            is_upcoming = show_d.pop("is_upcoming")
+            shows["upcoming_shows" if is_upcoming else "past_shows"].append(show_d)
+        # Past shows are listed most recent first.
+        shows["past_shows"].reverse()
+        data.update((name, shows[name]) for name in SHOW_LIST_FIELDS if name in names)
+    return data
+
+
+def _detail(entity_id, detail_query, shows_query):
+    row_query, shows, names = detail_plan(entity_id, detail_query, shows_query)
+    row = row_query.first()
+    show_rows = shows.all() if shows is not None and row is not None else None
+    return json_response(detail_data(names, row, show_rows))
+
+
+def search_plan(*columns, args=None):
+    # The columns to search for, and the fields to return.
+    available = OrderedDict((column.key, column) for column in columns)
+    names = requested_fields(available, ["id", "name", "num_upcoming_shows"], args)
+    return [available[name] for name in names], names
+
+
+def search_data(names, result):
+    return {
+        "count": result.count,
+        "count_capped": result.count_capped,
+        "data": [_row_dict(row, names) for row in result.rows],
+    }
+
+
+def _search(model, *columns):
+    columns, names = search_plan(*columns)
+    result = search_by_name(
+        model, request.args.get("q", ""), columns, requested_genres()
+    )
+    return json_response(search_data(names, result))
+
+
+def _batch_delete(model):
+    # Deletes the rows of the "ids" of the JSON body, with their shows, in one
+    # statement. Ids which do not exist are ignored: the response lists those
+    # actually deleted.
+    body = request.get_json(silent=True)
+    ids = body.get("ids") if isinstance(body, dict) else None
+    deleted = delete_by_ids(model, parse_ids(ids))
+    return json_response({"deleted": [row.id for row in deleted]})
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+
+@api.route("/venues")
+@conditional("Venue")
+def venues():
+    return _listing(
+        venues_listing_query(requested_genres()),
+        VENUE_LISTING_KEYS,
+        *VENUE_DETAIL_COLUMNS,
+    )
+
+
+@api.route("/venues", methods=["DELETE"])
+def delete_venues():
+    return _batch_delete(Venue)
+
+
+@api.route("/venues/search")
+def search_venues():
+    return _search(Venue, *VENUE_DETAIL_COLUMNS, num_upcoming_shows(Venue))
+
+
+@api.route("/venues/genres")
+@conditional("Venue")
+def venue_genres():
+    genres = requested_genres()
+    return json_response(facets_data(genres, genre_facets(Venue, genres)))
+
+
+@api.route("/venues/<int:venue_id>")
+@conditional("Venue", "Show", "Artist", time_dependent=True)
+def show_venue(venue_id):
+    return _detail(venue_id, venue_detail_query, venue_shows_query)
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+
+@api.route("/artists")
+@conditional("Artist")
+def artists():
+    return _listing(
+        artists_listing_query(requested_genres()),
+        ARTIST_LISTING_KEYS,
+        *ARTIST_DETAIL_COLUMNS,
+        num_upcoming_shows(Artist),
+    )
+
+
+@api.route("/artists", methods=["DELETE"])
+def delete_artists():
+    return _batch_delete(Artist)
+
+
+@api.route("/artists/search")
+def search_artists():
+    return _search(Artist, *ARTIST_DETAIL_COLUMNS, num_upcoming_shows(Artist))
+
+
+@api.route("/artists/genres")
+@conditional("Artist")
+def artist_genres():
+    genres = requested_genres()
+    return json_response(facets_data(genres, genre_facets(Artist, genres)))
+
+
+@api.route("/artists/<int:artist_id>")
+@conditional("Artist", "Show", "Venue", time_dependent=True)
+def show_artist(artist_id):
+    return _detail(artist_id, artist_detail_query, artist_shows_query)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+
+@api.route("/shows")
+@conditional("Show", "Venue", "Artist")
+def shows():
+    return _listing(shows_listing_query(), SHOW_LISTING_KEYS)
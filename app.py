@@ -3,176 +3,249 @@
 # ----------------------------------------------------------------------------#
 
 # import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, flash, redirect, url_for  # Response
-from flask_moment import Moment
+from flask import (
+    Flask,
+    Blueprint,
+    Request,
+    current_app,
+    render_template,
+    request,
+    flash,
+    redirect,
+    url_for,
+    abort,
+    jsonify,
+    Response,
+    stream_with_context,
+)
 import logging
 from logging import Formatter, FileHandler
 
-from forms import ShowForm, VenueForm, ArtistForm
-from models import init_db, Venue, Artist, Show
-import datetime
-from collections import defaultdict
+from models import init_db, db, Venue, Artist, Show
+from loaders import load_venue_detail, load_artist_detail
+from listings import (
+    venues_listing_query,
+    artists_listing_query,
+    shows_listing_query,
+    VENUE_LISTING_KEYS,
+    ARTIST_LISTING_KEYS,
+    SHOW_LISTING_KEYS,
+    VENUE_TILE_VERSIONS,
+    SHOW_TILE_VERSIONS,
+)
+from pagination import (
+    page_query,
+    make_page,
+    get_page_size,
+    url_for_page,
+    InvalidCursor,
+)
+from search import search_by_name
+from viewmodels import (
+    fetch_all,
+    build,
+    build_areas,
+    search_items,
+    VenueListing,
+    ArtistListing,
+    ShowListing,
+)
+from counters import rollover_past_shows, recompute_upcoming_counters
+from fragments import init_fragment_cache
+from deletion import delete_by_ids
+from conflicts import Slot, find_conflicts, describe
+from genres import init_genre_facets, requested_genres
+from conditional import conditional
+from routing import read_only
+from instrumentation import init_sql_instrumentation
+from assets import init_assets
+from functools import lru_cache
+import io
 import sys
+import tempfile
+
+import click
 
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object("config")
-# TODO: connect to a local postgresql database
-db = init_db(app)
+# Heavy dependencies (babel, dateutil, WTForms, Flask-Migrate) are only
+# imported when first needed, so that importing this module and creating the
+# app stay cheap for every worker, command and test run. So are the modules of
+# the optional packages (the API and orjson, the metrics and prometheus_client,
+# the compression and brotli) and those only serving a command or a route (the
+# plan check, the importer and the exporter).
+
+
+class UploadRequest(Request):
+    # Uploaded files are spooled to memory or to a temporary file, as Werkzeug
+    # does, but never to a SpooledTemporaryFile: io.TextIOWrapper, which reads
+    # the imported feeds, needs its readable() and seekable(), only there from
+    # Python 3.11 on.
+    max_spooled_size = 500 * 1024
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        size = total_content_length
+        if size is None or size > self.max_spooled_size:
+            return tempfile.TemporaryFile("wb+")
+        return io.BytesIO()
+
+
+def create_app(config=None, script_info=None, migrations=False):
+    # `config` overrides the settings of config.py. The Flask-Migrate commands
+    # (`flask db ...`) are registered under the flask CLI, which passes
+    # `script_info`, or with `migrations=True`.
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+    app.config.from_object("config")
+    app.config.update(config or {})
+    from flask_moment import Moment
+    from api import api
+    from metrics import init_metrics
+    from compression import init_compression
+
+    # TODO: connect to a local postgresql database
+    init_db(app, migrations=migrations or script_info is not None)
+    init_fragment_cache(app)
+    init_genre_facets(app)
+    Moment().init_app(app)
+    app.register_blueprint(pages)
+    app.register_blueprint(api)
+    init_sql_instrumentation(app)
+    init_metrics(app)
+    init_assets(app)
+    init_compression(app)
+
+    if not app.debug:
+        file_handler = FileHandler("error.log")
+        file_handler.setFormatter(
+            Formatter(
+                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
+            )
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info("errors")
+    return app
+
+
+pages = Blueprint("pages", __name__, cli_group=None)
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format="medium"):
-    date = dateutil.parser.parse(value)
-    if format == "full":
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == "medium":
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def _datetime_pattern(format):
+    # Parsed once per format, instead of on every call of babel.dates.format_datetime.
+    import babel.dates
+
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=None)
+def _locale(identifier):
+    import babel.dates
+
+    return babel.Locale.parse(identifier or babel.dates.LC_TIME)
+
+
+@lru_cache(maxsize=4096)
+def _format_datetime(value, format, locale):
+    return _datetime_pattern(format).apply(value, _locale(locale))
+
 
+@pages.app_template_filter("datetime")
+def format_datetime(value, format="medium", locale=None):
+    # Accepts datetime objects as well as ISO strings. Show pages repeat the
+    # same start times a lot, so recently formatted values are memoized.
+    # `locale` defaults to the LC_TIME locale of the environment.
+    if isinstance(value, str):
+        import dateutil.parser
 
-app.jinja_env.filters["datetime"] = format_datetime
+        value = dateutil.parser.parse(value)
+    return _format_datetime(value, format, locale)
+
+
+pages.add_app_template_global(url_for_page, "url_for_page")
 
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
 
-@app.route("/")
+@pages.route("/")
 def index():
     return render_template("pages/home.html")
 
 
-#  Venues
-#  ----------------------------------------------------------------
+def _paginate(query, keys, view_model):
+    # The rows of the page are read with Core into `view_model`s.
+    try:
+        page = page_query(
+            query, keys, cursor=request.args.get("cursor"), page_size=get_page_size()
+        )
+    except InvalidCursor:
+        abort(400)
+    return make_page(page, build(view_model, fetch_all(page.query)))
 
 
-def count_id2num_upcoming_shows_for_venue():
-    nowtime = datetime.datetime.utcnow()
-    # Use defaultdict in order to return 0 for all the venue id by default.
-    id2num_upcoming_shows = defaultdict(int)
-    # Count and save # of upcoming shows only for venue entries to which the coressponding show exists.
-    id2upcoming_shows_dict = dict(
-        db.session.query(Venue.id, db.func.count(Show.id))
-        .join(Show, Show.venue_id == Venue.id)
-        .filter(Show.start_time > nowtime)
-        .group_by(Venue.id)
-        .all()
-    )
-    id2num_upcoming_shows.update(id2upcoming_shows_dict)
-    return id2num_upcoming_shows
+#  Venues
+#  ----------------------------------------------------------------
 
 
-@app.route("/venues")
+@pages.route("/venues")
+@conditional("Venue")
 def venues():
-    # TODO: replace with real venues data.
-    #       num_shows should be aggregated based on number of upcoming shows per venue.
-    id2num_upcoming_shows = count_id2num_upcoming_shows_for_venue()
-
-    # format data for rendering template
-    dd = defaultdict(list)
-    for u in db.session.query(Venue.id, Venue.name, Venue.city, Venue.state).all():
-        dd[(u.city, u.state)].append(
-            {
-                "id": u.id,
-                "name": u.name,
-                "num_upcoming_shows": id2num_upcoming_shows[u.id],
-            }
-        )
-    data = [
-        {"city": city, "state": state, "venues": venues}
-        for (city, state), venues in dd.items()
-    ]
-
-    return render_template("pages/venues.html", areas=data)
+    # Venues are listed page by page, ordered by (city, state, name, id).
+    page = _paginate(
+        venues_listing_query(requested_genres()).add_columns(*VENUE_TILE_VERSIONS),
+        VENUE_LISTING_KEYS,
+        VenueListing,
+    )
+    return render_template(
+        "pages/venues.html", areas=build_areas(page.items), page=page
+    )
 
 
-@app.route("/venues/search", methods=["POST"])
+@pages.route("/venues/search", methods=["POST"])
+@read_only
 def search_venues():
     # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
-    id2num_upcoming_shows = count_id2num_upcoming_shows_for_venue()
-
-    # Use .ilike for case-insensitive substring search.
+    # Substring search backed by the trigram index on Venue.name; see search.py.
     search_term = request.form.get("search_term", "")
-    data = (
-        db.session.query(Venue.id, Venue.name)
-        .filter(Venue.name.ilike(f"%{search_term}%"))
-        .all()
-    )
+    result = search_by_name(Venue, search_term, genres=requested_genres(request.values))
     response = {
-        "count": len(data),
-        "data": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "num_upcoming_shows": id2num_upcoming_shows[r.id],
-            }
-            for r in data
-        ],
+        "count": result.count,
+        "count_capped": result.count_capped,
+        "data": search_items(result.rows),
     }
     return render_template(
         "pages/search_venues.html", results=response, search_term=search_term
     )
 
 
-@app.route("/venues/<int:venue_id>")
+@pages.route("/venues/<int:venue_id>")
+@conditional("Venue", "Show", "Artist", time_dependent=True)
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
-
-    # Perform two distinct join query instead of doing like the following for performance issue:
-    #   session.query(Show, Artist, Venue).join(Artist, ...).join(Venue, ...)
-    # I'm afraid that this creates an initial large table whose size is (n_shows * n_artist * n_venue)-order.
-    show_artist = (
-        db.session.query(Show, Artist).join(Artist, Artist.id == Show.artist_id).all()
-    )
-    showid2entry = {show.id: (show.start_time, artist) for show, artist in show_artist}
-    venue_show = (
-        db.session.query(Venue, Show).outerjoin(Show, Show.venue_id == Venue.id).all()
-    )
-
-    nowtime = datetime.datetime.utcnow()
-    data_dict = defaultdict(list)
-    for venue, show in venue_show:
-        if venue.id not in data_dict:
-            venue_d = venue.__dict__
-            if "_sa_instance_state" in venue_d:
-                del venue_d["_sa_instance_state"]
-            data_dict[venue.id] = venue_d
-            d = data_dict[venue.id]
-            d["past_shows"] = []
-            d["upcoming_shows"] = []
-            d["past_shows_count"] = 0
-            d["upcoming_shows_count"] = 0
-        else:
-            d = data_dict[venue.id]
-
-        if show is not None:
-            start_time, artist = showid2entry[show.id]
-            show_d = {
-                "artist_id": artist.id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": start_time.isoformat(),
-            }
-            if start_time > nowtime:
-                d["upcoming_shows"].append(show_d)
-                d["upcoming_shows_count"] += 1
-            else:
-                d["past_shows"].append(show_d)
-                d["past_shows_count"] += 1
-    data = data_dict[venue_id]
+    # Only the venue and its own shows are loaded; see loaders.py.
+    data = load_venue_detail(venue_id)
+    if data is None:
+        abort(404)
 
     return render_template("pages/show_venue.html", venue=data)
 
@@ -181,13 +254,15 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route("/venues/create", methods=["GET"])
+@pages.route("/venues/create", methods=["GET"])
 def create_venue_form():
+    from forms import VenueForm
+
     form = VenueForm()
     return render_template("forms/new_venue.html", form=form)
 
 
-@app.route("/venues/create", methods=["POST"])
+@pages.route("/venues/create", methods=["POST"])
 def create_venue_submission():
     # TODO: insert form data as a new Venue record in the db, instead
     # TODO(?): modify data to be the data object returned from db insertion
@@ -222,27 +297,20 @@ def create_venue_submission():
     return render_template("pages/home.html")
 
 
-@app.route("/venues/<venue_id>", methods=["DELETE"])
+@pages.route("/venues/<int:venue_id>", methods=["DELETE"])
 def delete_venue(venue_id):
-    # TODO: Complete this endpoint for taking a venue_id, and using
-    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
-    error = False
+    # A single statement, the venue's shows being deleted by the database; see
+    # deletion.py.
     try:
-        venue = Venue.query.get(venue_id)
-        db.session.delete(venue)
-        db.session.commit()
+        deleted = delete_by_ids(Venue, [venue_id])
     except Exception:
-        error = True
         db.session.rollback()
+        deleted = None
     finally:
         db.session.close()
-    if not error:
-        # on successful db insert, flash success
-        flash("Venue " + venue.name + " has successfully been deleted!")
+    if deleted:
+        flash("Venue " + deleted[0].name + " has successfully been deleted!")
     else:
-        # TODO: on unsuccessful db insert, flash an error instead.
-        # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
-        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
         flash("An error occurred. Venue could not be deleted.")
 
     # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
@@ -254,115 +322,71 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route("/artists")
+@pages.route("/artists")
+@conditional("Artist")
 def artists():
-    # TODO: replace with real data returned from querying the database
-    data = db.session.query(Artist.id, Artist.name).all()
-    return render_template("pages/artists.html", artists=data)
-
-
-def count_id2num_upcoming_shows_for_artist():
-    nowtime = datetime.datetime.utcnow()
-    # Use defaultdict in order to return 0 for all the artist id by default.
-    id2num_upcoming_shows = defaultdict(int)
-    # Count and save # of upcoming shows only for artist entries to which the coressponding show exists.
-    id2upcoming_shows_dict = dict(
-        db.session.query(Artist.id, db.func.count(Show.id))
-        .join(Show, Show.artist_id == Artist.id)
-        .filter(Show.start_time > nowtime)
-        .group_by(Artist.id)
-        .all()
+    page = _paginate(
+        artists_listing_query(requested_genres()), ARTIST_LISTING_KEYS, ArtistListing
     )
-    id2num_upcoming_shows.update(id2upcoming_shows_dict)
-    return id2num_upcoming_shows
+    return render_template("pages/artists.html", artists=page.items, page=page)
 
 
-@app.route("/artists/search", methods=["POST"])
+@pages.route("/artists/search", methods=["POST"])
+@read_only
 def search_artists():
     # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
-    id2num_upcoming_shows = count_id2num_upcoming_shows_for_artist()
-
+    # Substring search backed by the trigram index on Artist.name; see search.py.
     search_term = request.form.get("search_term", "")
-    data = (
-        db.session.query(Artist.id, Artist.name)
-        .filter(Artist.name.ilike(f"%{search_term}%"))
-        .all()
+    result = search_by_name(
+        Artist, search_term, genres=requested_genres(request.values)
     )
-    print(data)
     response = {
-        "count": len(data),
-        "data": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "num_upcoming_shows": id2num_upcoming_shows[r.id],
-            }
-            for r in data
-        ],
+        "count": result.count,
+        "count_capped": result.count_capped,
+        "data": search_items(result.rows),
     }
     return render_template(
         "pages/search_artists.html", results=response, search_term=search_term
     )
 
 
-@app.route("/artists/<int:artist_id>")
+@pages.route("/artists/<int:artist_id>")
+@conditional("Artist", "Show", "Venue", time_dependent=True)
 def show_artist(artist_id):
-    # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
-    # Perform two distinct join query instead of doing like the following for performance issue:
-    #   session.query(Show, Artist, Venue).join(Artist, ...).join(Venue, ...)
-    # I'm afraid that this creates an initial large table whose size is (n_shows * n_artist * n_venue)-order.
-    nowtime = datetime.datetime.utcnow()
-    show_venue = (
-        db.session.query(Show, Venue).join(Venue, Venue.id == Show.venue_id).all()
-    )
-    showid2entry = {show.id: (show.start_time, venue) for show, venue in show_venue}
-    artist_show = (
-        db.session.query(Artist, Show)
-        .outerjoin(Show, Show.artist_id == Artist.id)
-        .all()
-    )
-    data_dict = defaultdict(list)
-    for artist, show in artist_show:
-        if artist.id not in data_dict:
-            artist_d = artist.__dict__
-            if "_sa_instance_state" in artist_d:
-                del artist_d["_sa_instance_state"]
-            data_dict[artist.id] = artist_d
-            d = data_dict[artist.id]
-            d["past_shows"] = []
-            d["upcoming_shows"] = []
-            d["past_shows_count"] = 0
-            d["upcoming_shows_count"] = 0
-        else:
-            d = data_dict[artist.id]
-
-        if show is not None:
-            start_time, venue = showid2entry[show.id]
-            show_d = {
-                "venue_id": venue.id,
-                "venue_name": venue.name,
-                "venue_image_link": venue.image_link,
-                "start_time": start_time.isoformat(),
-            }
-            if start_time > nowtime:
-                d["upcoming_shows"].append(show_d)
-                d["upcoming_shows_count"] += 1
-            else:
-                d["past_shows"].append(show_d)
-                d["past_shows_count"] += 1
-    data = data_dict[artist_id]
+    # shows the artist page with the given artist_id
+    # Only the artist and its own shows are loaded; see loaders.py.
+    data = load_artist_detail(artist_id)
+    if data is None:
+        abort(404)
 
     return render_template("pages/show_artist.html", artist=data)
 
 
+@pages.route("/artists/<int:artist_id>", methods=["DELETE"])
+def delete_artist(artist_id):
+    try:
+        deleted = delete_by_ids(Artist, [artist_id])
+    except Exception:
+        db.session.rollback()
+        deleted = None
+    finally:
+        db.session.close()
+    if deleted:
+        flash("Artist " + deleted[0].name + " has successfully been deleted!")
+    else:
+        flash("An error occurred. Artist could not be deleted.")
+    return render_template("pages/home.html")
+
+
 #  Update
 #  ----------------------------------------------------------------
-@app.route("/artists/<int:artist_id>/edit", methods=["GET"])
+@pages.route("/artists/<int:artist_id>/edit", methods=["GET"])
 def edit_artist(artist_id):
     artist = Artist.query.get(artist_id)
+    from forms import ArtistForm
+
     form = ArtistForm(obj=artist)
     if form.validate():
         form.populate_obj(artist)
@@ -370,7 +394,7 @@ def edit_artist(artist_id):
     return render_template("forms/edit_artist.html", form=form, artist=artist)
 
 
-@app.route("/artists/<int:artist_id>/edit", methods=["POST"])
+@pages.route("/artists/<int:artist_id>/edit", methods=["POST"])
 def edit_artist_submission(artist_id):
     # TODO: take values from the form submitted, and update existing
     # artist record with ID <artist_id> using the new attributes
@@ -401,12 +425,14 @@ def edit_artist_submission(artist_id):
             + " could not be updated."
         )
         # abort(400)
-    return redirect(url_for("show_artist", artist_id=artist_id))
+    return redirect(url_for(".show_artist", artist_id=artist_id))
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["GET"])
+@pages.route("/venues/<int:venue_id>/edit", methods=["GET"])
 def edit_venue(venue_id):
     venue = Venue.query.get(venue_id)
+    from forms import VenueForm
+
     form = VenueForm(obj=venue)
     if form.validate():
         form.populate_obj(venue)
@@ -415,7 +441,7 @@ def edit_venue(venue_id):
     return render_template("forms/edit_venue.html", form=form, venue=venue)
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["POST"])
+@pages.route("/venues/<int:venue_id>/edit", methods=["POST"])
 def edit_venue_submission(venue_id):
     # TODO: take values from the form submitted, and update existing
     # venue record with ID <venue_id> using the new attributes
@@ -446,20 +472,22 @@ def edit_venue_submission(venue_id):
             + " could not be updated."
         )
         # abort(400)
-    return redirect(url_for("show_venue", venue_id=venue_id))
+    return redirect(url_for(".show_venue", venue_id=venue_id))
 
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
 
-@app.route("/artists/create", methods=["GET"])
+@pages.route("/artists/create", methods=["GET"])
 def create_artist_form():
+    from forms import ArtistForm
+
     form = ArtistForm()
     return render_template("forms/new_artist.html", form=form)
 
 
-@app.route("/artists/create", methods=["POST"])
+@pages.route("/artists/create", methods=["POST"])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     # TODO: insert form data as a new Venue record in the db, instead
@@ -497,95 +525,194 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 
-@app.route("/shows")
+@pages.route("/shows")
+@conditional("Show", "Venue", "Artist")
 def shows():
     # displays list of shows at /shows
-    # TODO: replace with real venues data.
-    #       num_shows should be aggregated based on number of upcoming shows per venue.
-    # Perform two distinct join query instead of doing like the following for performance issue:
-    #   session.query(Show, Artist, Venue).join(Artist, ...).join(Venue, ...)
-    # I'm afraid that this creates an initial large table whose size is (n_shows * n_artist * n_venue)-order.
-    show_venue = (
-        db.session.query(Show, Venue).join(Venue, Venue.id == Show.venue_id).all()
-    )
-    showid2entry = {show.id: (show.start_time, venue) for show, venue in show_venue}
-    show_artist = (
-        db.session.query(Show, Artist).join(Artist, Artist.id == Show.artist_id).all()
+    # Shows are listed page by page, ordered by (start_time, id).
+    page = _paginate(
+        shows_listing_query().add_columns(*SHOW_TILE_VERSIONS),
+        SHOW_LISTING_KEYS,
+        ShowListing,
     )
 
-    data = []
-    for show, artist in show_artist:
-        start_time, venue = showid2entry[show.id]
-        data.append(
-            {
-                "venue_id": venue.id,
-                "venue_name": venue.name,
-                "artist_id": artist.id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": start_time.isoformat(),
-            }
-        )
+    return render_template("pages/shows.html", shows=page.items, page=page)
 
-    return render_template("pages/shows.html", shows=data)
 
+@pages.route("/shows.<any(csv, ndjson):fmt>")
+def export_shows_data(fmt):
+    # Full dump of the shows, streamed; see exporter.py.
+    from exporter import export_shows, EXPORT_FORMATS
 
-@app.route("/shows/create")
+    response = Response(
+        stream_with_context(export_shows(fmt)), mimetype=EXPORT_FORMATS[fmt]
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename=shows.{fmt}"
+    return response
+
+
+@pages.route("/shows/create")
 def create_shows():
     # renders form. do not touch.
+    from forms import ShowForm
+
     form = ShowForm()
     return render_template("forms/new_show.html", form=form)
 
 
-@app.route("/shows/create", methods=["POST"])
+@pages.route("/shows/create", methods=["POST"])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
-    # TODO: insert form data as a new Show record in the db, instead
+    # The venue and the artist must both be free for the show; see conflicts.py.
+    from forms import ShowForm
 
+    form = ShowForm(request.form, meta={"csrf": False})
+    if not form.validate():
+        flash("An error occurred. Show could not be listed.")
+        return render_template("pages/home.html")
+    slot = Slot(
+        form.venue_id.data,
+        form.artist_id.data,
+        form.start_time.data,
+        form.duration_minutes.data,
+    )
     error = False
     try:
-        formdata = request.form.to_dict()
-        show = Show(**formdata)
-        db.session.add(show)
-        db.session.commit()
+        conflicts = find_conflicts([slot])
+        if not conflicts:
+            db.session.add(Show(**slot._asdict()))
+            db.session.commit()
     except Exception:
         error = True
         db.session.rollback()
-        print(sys.exc_info())
+        current_app.logger.exception("Could not list show %r", slot)
     finally:
         db.session.close()
-    if not error:
-        # on successful db insert, flash success
-        flash("Show was successfully listed!")
-    else:
+    if error:
         # TODO: on unsuccessful db insert, flash an error instead.
         # e.g., flash('An error occurred. Show could not be listed.')
         # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
         flash("An error occurred. Show could not be listed.")
         # abort(400)
+    elif conflicts:
+        flash("Show could not be listed. " + describe(conflicts[0]))
+    else:
+        # on successful db insert, flash success
+        flash("Show was successfully listed!")
 
     return render_template("pages/home.html")
 
 
-@app.errorhandler(404)
+#  Import
+#  ----------------------------------------------------------------
+
+
+@pages.route("/import/<kind>", methods=["POST"])
+def import_data(kind):
+    # Bulk import of a CSV or NDJSON feed, sent as the "file" field of a form or
+    # as the request body; see importer.py.
+    from importer import import_stream, guess_format, IMPORT_KINDS, FORMATS
+
+    if kind not in IMPORT_KINDS:
+        abort(404)
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, filename, mimetype = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, mimetype = request.stream, None, request.mimetype
+    fmt = request.args.get("format") or guess_format(filename, mimetype)
+    if fmt not in FORMATS:
+        abort(400)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    report = import_stream(kind, text, fmt)
+    return jsonify(report.as_dict())
+
+
+@pages.app_errorhandler(404)
 def not_found_error(error):
     return render_template("errors/404.html"), 404
 
 
-@app.errorhandler(500)
+@pages.app_errorhandler(500)
 def server_error(error):
     return render_template("errors/500.html"), 500
 
 
-if not app.debug:
-    file_handler = FileHandler("error.log")
-    file_handler.setFormatter(
-        Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info("errors")
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+
+@pages.cli.command("rollover-shows")
+def rollover_shows_command():
+    # Moves shows which have started from upcoming to past; run it periodically.
+    n_shows = rollover_past_shows()
+    print(f"{n_shows} show(s) rolled over.")
+
+
+@pages.cli.command("check-plans")
+def check_plans_command():
+    # Fails when a hot query is not served by indexes; see plancheck.py.
+    from plancheck import check_plans
+
+    failures = check_plans()
+    for name, problems in failures:
+        print(f"FAIL {name}: {', '.join(problems)}")
+    if failures:
+        sys.exit(1)
+    print("All hot queries are served by indexes.")
+
+
+def _check_choice(value, choices, hint):
+    # click.Choice, for choices known once their module is imported.
+    if value is not None and value not in choices:
+        raise click.BadParameter(
+            f"{value!r} is not one of {', '.join(map(repr, sorted(choices)))}.",
+            param_hint=hint,
+        )
+
+
+@pages.cli.command("import-data")
+@click.argument("kind")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", help="csv or ndjson, guessed from the extension.")
+def import_data_command(kind, path, fmt):
+    # Imports venues, artists or shows from a CSV or NDJSON file; see importer.py.
+    from importer import import_stream, guess_format, IMPORT_KINDS, FORMATS
+
+    _check_choice(kind, IMPORT_KINDS, "KIND")
+    _check_choice(fmt, FORMATS, "--format")
+    fmt = fmt or guess_format(path)
+    if fmt is None:
+        raise click.UsageError("Cannot guess the format of the file, use --format.")
+    with open(path, encoding="utf-8", newline="") as f:
+        report = import_stream(kind, f, fmt)
+    for error in report.errors:
+        print(f"line {error['line']}: {error['errors']}")
+    print(f"{report.inserted} row(s) imported, {report.failed} rejected.")
+    if report.failed:
+        sys.exit(1)
+
+
+@pages.cli.command("export-shows")
+@click.option("--format", "fmt", default="csv", help="csv or ndjson.")
+@click.option(
+    "--output", type=click.File("w", encoding="utf-8", lazy=True), default="-"
+)
+def export_shows_command(fmt, output):
+    # Writes every show with its venue and artist names; see exporter.py.
+    from exporter import export_shows, EXPORT_FORMATS
+
+    _check_choice(fmt, EXPORT_FORMATS, "--format")
+    for chunk in export_shows(fmt):
+        output.write(chunk)
+
+
+@pages.cli.command("recompute-counters")
+def recompute_counters_command():
+    recompute_upcoming_counters()
+    print("Upcoming show counters recomputed.")
+
 
 # ----------------------------------------------------------------------------#
 # Launch.
@@ -593,11 +720,11 @@ if not app.debug:
 
 # Default port:
 if __name__ == "__main__":
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 """
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 """
@@ -0,0 +1,364 @@
+# ASGI entry point. The read routes of the JSON API (listings, details, searches
+# and genre counts under /api/v1) are served from asyncio, so that requests waiting on
+# the database or on slow clients hold a coroutine rather than a worker thread:
+#
+#   uvicorn asgi:app --workers 2
+#
+# SQLAlchemy 1.3 has no asyncio support: these routes build the very same
+# queries as api.py, compile them for PostgreSQL and run them on an asyncpg pool
+# of ASYNC_DB_POOL_SIZE connections per worker, so both paths return the same
+# bodies, ETags and 304s. Every other request, writes included, is passed on to
+# the Flask app, which asgiref runs in a thread pool.
+# The HTML pages are among them: their time goes to rendering the templates,
+# not to waiting on the database, and they are no faster through this path
+# than under a threaded WSGI server (see loadtest.py).
+# The async routes read from the primary, are sent uncompressed, and only
+# report their SQL time in a Server-Timing header: replica routing, the
+# compression middleware, /_debug/sql and the request metrics only cover the
+# Flask path.
+import asyncio
+import functools
+import re
+import time
+from collections import namedtuple
+
+import asyncpg
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.dialects.postgresql import psycopg2
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags, quote_etag
+from werkzeug.urls import url_decode
+
+from api import (
+    dumps,
+    listing_plan,
+    listing_data,
+    detail_plan,
+    detail_data,
+    search_plan,
+    search_data,
+)
+from app import create_app
+from conditional import table_versions_query, make_etag, is_not_modified
+from counters import num_upcoming_shows
+from genres import (
+    facet_key,
+    facets_data,
+    facets_query,
+    requested_genres,
+    table_version_query,
+    GenreCount,
+)
+from listings import (
+    venues_listing_query,
+    artists_listing_query,
+    shows_listing_query,
+    VENUE_LISTING_KEYS,
+    ARTIST_LISTING_KEYS,
+    SHOW_LISTING_KEYS,
+)
+from loaders import (
+    venue_detail_query,
+    artist_detail_query,
+    venue_shows_query,
+    artist_shows_query,
+    VENUE_DETAIL_COLUMNS,
+    ARTIST_DETAIL_COLUMNS,
+)
+from models import Venue, Artist
+from search import (
+    search_query,
+    count_query,
+    search_limits,
+    needs_count,
+    make_search_result,
+)
+
+
+_dialect = psycopg2.dialect()
+# What the dialect finds out on its first connection to any server since 8.2,
+# with the default standard_conforming_strings: backslashes are literal.
+_dialect._backslash_escapes = False
+_PARAMETER = re.compile(r"%\((\w+)\)s|%%")
+_SCHEME = re.compile(r"^postgres(ql)?(\+\w+)?://")
+
+
+def compile_query(query):
+    # The SQL of an ORM query with asyncpg's $n placeholders, and its arguments.
+    compiled = query.statement.compile(dialect=_dialect)
+    names = []
+
+    def placeholder(match):
+        name = match.group(1)
+        if name is None:
+            return "%"
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    sql = _PARAMETER.sub(placeholder, compiled.string)
+    return sql, [compiled.params[name] for name in names]
+
+
+@functools.lru_cache(maxsize=None)
+def _row_class(columns):
+    return namedtuple("Row", columns, rename=True)
+
+
+def _row(record):
+    # asyncpg records, read like the rows of SQLAlchemy queries.
+    return _row_class(tuple(record.keys()))(*record.values())
+
+
+class ReadRequest:
+    def __init__(self, connection, args):
+        self.connection = connection
+        self.args = args
+        self.queries = 0
+        self.db_duration = 0.0
+
+    async def _run(self, method, query):
+        sql, arguments = compile_query(query)
+        started_at = time.perf_counter()
+        try:
+            return await method(sql, *arguments)
+        finally:
+            self.queries += 1
+            self.db_duration += time.perf_counter() - started_at
+
+    async def fetch(self, query):
+        return [
+            _row(record) for record in await self._run(self.connection.fetch, query)
+        ]
+
+    async def fetchrow(self, query):
+        record = await self._run(self.connection.fetchrow, query)
+        return None if record is None else _row(record)
+
+    async def fetchval(self, query):
+        return await self._run(self.connection.fetchval, query)
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.pool = None
+        self._pool_lock = None
+        listing, detail, search, facets = (
+            self.listing,
+            self.detail,
+            self.search,
+            self.facets,
+        )
+        # Endpoint -> coroutine function of the request and the URL's values.
+        self.views = {
+            "api.venues": lambda read: listing(
+                read, venues_listing_query, VENUE_LISTING_KEYS, *VENUE_DETAIL_COLUMNS
+            ),
+            "api.venue_genres": lambda read: facets(read, Venue),
+            "api.search_venues": lambda read: search(
+                read, Venue, *VENUE_DETAIL_COLUMNS, num_upcoming_shows(Venue)
+            ),
+            "api.show_venue": lambda read, venue_id: detail(
+                read, venue_id, venue_detail_query, venue_shows_query
+            ),
+            "api.artist_genres": lambda read: facets(read, Artist),
+            "api.artists": lambda read: listing(
+                read,
+                artists_listing_query,
+                ARTIST_LISTING_KEYS,
+                *ARTIST_DETAIL_COLUMNS,
+                num_upcoming_shows(Artist),
+            ),
+            "api.search_artists": lambda read: search(
+                read, Artist, *ARTIST_DETAIL_COLUMNS, num_upcoming_shows(Artist)
+            ),
+            "api.show_artist": lambda read, artist_id: detail(
+                read, artist_id, artist_detail_query, artist_shows_query
+            ),
+            "api.shows": lambda read: listing(
+                read, shows_listing_query, SHOW_LISTING_KEYS, genres=False
+            ),
+        }
+
+    # Queries are built within an app context, which must not be held across
+    # an await: contexts are per thread, and so shared by all the coroutines.
+
+    def context(self):
+        return self.flask_app.app_context()
+
+    async def listing(self, read, query, keys, *columns, genres=True):
+        # `query` builds the listing query, of the requested genres if `genres`.
+        with self.context():
+            query = query(requested_genres(read.args)) if genres else query()
+            page, names = listing_plan(query, keys, *columns, args=read.args)
+        return listing_data(page, names, await read.fetch(page.query))
+
+    async def detail(self, read, entity_id, detail_query, shows_query):
+        with self.context():
+            row_query, shows, names = detail_plan(
+                entity_id, detail_query, shows_query, read.args
+            )
+        row = await read.fetchrow(row_query)
+        show_rows = None
+        if shows is not None and row is not None:
+            show_rows = await read.fetch(shows)
+        return detail_data(names, row, show_rows)
+
+    async def search(self, read, model, *columns):
+        search_term = read.args.get("q", "")
+        with self.context():
+            columns, names = search_plan(*columns, args=read.args)
+            limit, cap = search_limits()
+            genres = requested_genres(read.args)
+            rows_query = search_query(model, search_term, limit, columns, genres)
+            counting_query = count_query(model, search_term, cap, genres)
+        rows = await read.fetch(rows_query)
+        count = len(rows)
+        if needs_count(rows, limit):
+            count = await read.fetchval(counting_query)
+        return search_data(names, make_search_result(rows, count, cap))
+
+    async def facets(self, read, model):
+        # Cached by table version, as genres.genre_facets.
+        genres = requested_genres(read.args)
+        with self.context():
+            version_query = table_version_query(model)
+            counts_query = facets_query(model, genres)
+        cache = self.flask_app.extensions["genre_facets"]
+        key = facet_key(model, genres)
+        version = await read.fetchval(version_query)
+        counts = cache.get(key, version)
+        if counts is None:
+            counts = [GenreCount(*row) for row in await read.fetch(counts_query)]
+            cache.set(key, version, counts)
+        return facets_data(genres, counts)
+
+    async def etag(self, read, view):
+        # The ETag of a @conditional route, or None.
+        spec = getattr(view, "conditional_tables", None)
+        if spec is None or not self.flask_app.config.get(
+            "CONDITIONAL_GET_ENABLED", True
+        ):
+            return None
+        tables, time_dependent = spec
+        with self.context():
+            versions_query = table_versions_query(tables)
+        versions = await read.fetch(versions_query)
+        with self.context():
+            return make_etag(versions, time_dependent)
+
+    def match(self, scope):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        adapter = self.flask_app.url_map.bind("localhost")
+        try:
+            endpoint, values = adapter.match(scope["path"], "GET")
+        except HTTPException:
+            return None
+        if endpoint not in self.views:
+            return None
+        return endpoint, values
+
+    async def connect(self):
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self.pool is None:
+                config = self.flask_app.config
+                profile = config.get("DB_POOL_PROFILES", {}).get("web", {})
+                timeout = int(profile.get("statement_timeout_ms") or 0)
+                self.pool = await asyncpg.create_pool(
+                    _SCHEME.sub("postgresql://", config["SQLALCHEMY_DATABASE_URI"]),
+                    min_size=1,
+                    max_size=config.get("ASYNC_DB_POOL_SIZE", 10),
+                    server_settings={"statement_timeout": str(timeout)},
+                )
+        return self.pool
+
+    async def handle(self, scope, endpoint, values):
+        started_at = time.perf_counter()
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        args = url_decode(scope["query_string"])
+        pool = self.pool or await self.connect()
+        status, response_headers, body = 200, [], b""
+        async with pool.acquire() as connection:
+            read = ReadRequest(connection, args)
+            try:
+                etag = await self.etag(read, self.flask_app.view_functions[endpoint])
+                if etag is not None and is_not_modified(
+                    etag, parse_etags(headers.get("if-none-match"))
+                ):
+                    status = 304
+                else:
+                    body = dumps(await self.views[endpoint](read, **values))
+                    response_headers.append(("content-type", "application/json"))
+                if etag is not None:
+                    response_headers.append(("etag", quote_etag(etag)))
+                    response_headers.append(("cache-control", "no-cache"))
+            except HTTPException as error:
+                status, response_headers = error.code, [
+                    ("content-type", "application/json")
+                ]
+                body = dumps({"error": error.description})
+        if isinstance(body, str):
+            body = body.encode()
+        elapsed = time.perf_counter() - started_at
+        response_headers.append(
+            (
+                "server-timing",
+                f'db;dur={read.db_duration * 1000:.1f};desc="{read.queries} queries", '
+                f"app;dur={elapsed * 1000:.1f}",
+            )
+        )
+        response_headers.append(("content-length", str(len(body))))
+        return status, response_headers, body
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.connect()
+                except Exception as error:
+                    await send(
+                        {"type": "lifespan.startup.failed", "message": str(error)}
+                    )
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.pool is not None:
+                    await self.pool.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        route = self.match(scope)
+        if route is None:
+            return await self.wsgi(scope, receive, send)
+        try:
+            status, headers, body = await self.handle(scope, *route)
+        except Exception:
+            self.flask_app.logger.exception("Error on %s", scope["path"])
+            status, headers = 500, [("content-type", "application/json")]
+            body = dumps({"error": "Internal server error."})
+            body = body.encode() if isinstance(body, str) else body
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (k.encode("latin-1"), v.encode("latin-1")) for k, v in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+app = AsyncReadApp(create_app())
@@ -0,0 +1,106 @@
+# Fingerprinted static assets.
+# build_assets.py copies every file of static/ to static/dist/ under a name
+# carrying a hash of its content (css/main.css -> css/main.1f2e3d4c5b6a.css),
+# bundles and minifies the stylesheets and scripts of BUNDLES, writes gzip and
+# brotli variants, and records the names in static/dist/manifest.json.
+#
+# Templates reference assets with `asset_url("js/script.js")`, and bundles with
+# `asset_urls("app.css")`, which lists the URLs of the bundle or, when nothing
+# has been built (e.g. in development), of its source files. Built files are
+# served from ASSETS_URL_PATH with a one year, immutable cache lifetime, and
+# precompressed to clients which accept it: a changed file gets a new URL.
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+
+
+# Bundle -> source files, relative to static/, in the order they are loaded.
+BUNDLES = {
+    "app.css": [
+        "css/bootstrap.min.css",
+        "css/layout.main.css",
+        "css/main.css",
+        "css/main.responsive.css",
+        "css/main.quickfix.css",
+    ],
+    "head.js": ["js/libs/modernizr-2.8.2.min.js", "js/libs/moment.min.js"],
+    # Deferred, after jQuery.
+    "app.js": ["js/script.js", "js/libs/bootstrap-3.1.1.min.js", "js/plugins.js"],
+}
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+# Content-Encoding -> suffix of the precompressed variant, by preference.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _manifest():
+    return current_app.extensions["assets"]
+
+
+def asset_url(filename):
+    # URL of the fingerprinted copy of a file of static/, or of the file itself
+    # when it has not been built.
+    manifest = _manifest()
+    if manifest is not None and filename in manifest:
+        return url_for("assets", filename=manifest[filename])
+    return url_for("static", filename=filename)
+
+
+def asset_urls(bundle):
+    manifest = _manifest()
+    if manifest is not None and bundle in manifest:
+        return [url_for("assets", filename=manifest[bundle])]
+    return [asset_url(filename) for filename in BUNDLES[bundle]]
+
+
+def _accepts(encoding):
+    return encoding in request.accept_encodings
+
+
+def serve_asset(filename):
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    if filename == MANIFEST:
+        raise NotFound()
+    sent, encoding = filename, None
+    for candidate, suffix in ENCODINGS:
+        if _accepts(candidate) and os.path.isfile(
+            os.path.join(directory, filename + suffix)
+        ):
+            sent, encoding = filename + suffix, candidate
+            break
+    max_age = current_app.config.get("ASSETS_MAX_AGE", 31536000)
+    response = send_from_directory(
+        directory,
+        sent,
+        # The type of the file itself, not of its compressed variant.
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        cache_timeout=max_age,
+        conditional=True,
+    )
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = f"public, max-age={max_age}, immutable"
+    return response
+
+
+def init_assets(app):
+    app.extensions["assets"] = load_manifest(app.static_folder)
+    app.add_url_rule(
+        app.config.get("ASSETS_URL_PATH", "/assets") + "/<path:filename>",
+        "assets",
+        serve_asset,
+    )
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
@@ -0,0 +1,213 @@
+# Performance benchmark of every route of the app.
+# Seeds catalogs of the requested sizes into a scratch database (ALL ITS DATA IS
+# DELETED), drives each route through the Flask test client and reports latency
+# percentiles, SQL query counts and peak Python memory per route.
+#
+#   $ python benchmark.py --database-url postgresql://localhost/fyyurr_bench \
+#         --sizes 1000,100000,1000000 --output bench.json
+#   $ python benchmark.py --database-url ... --baseline bench.json
+#
+# With --baseline, the results are compared against a previous run.
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import event
+
+from percentiles import percentiles
+from populate_db import seed_catalog
+
+
+# Catalog shape: one venue per VENUE_RATIO shows and one artist per ARTIST_RATIO shows.
+VENUE_RATIO = 50
+ARTIST_RATIO = 20
+
+
+def seed(db, n_shows):
+    counts = seed_catalog(
+        db.session,
+        n_venues=max(1, n_shows // VENUE_RATIO),
+        n_artists=max(1, n_shows // ARTIST_RATIO),
+        n_shows=n_shows,
+        truncate=True,
+    )
+    db.session.commit()
+    return counts
+
+
+def routes(client):
+    # (name, method, path, form data). Detail pages use the first venue and artist,
+    # the second page of /shows is reached through the first page's cursor.
+    first_page = client.get("/shows")
+    next_cursor = None
+    marker = b'class="next"><a href="'
+    if marker in first_page.data:
+        start = first_page.data.index(marker) + len(marker)
+        url = first_page.data[start : first_page.data.index(b'"', start)].decode()
+        next_cursor = url.replace("&amp;", "&")
+    result = [
+        ("index", "GET", "/", None),
+        ("venues", "GET", "/venues", None),
+        ("artists", "GET", "/artists", None),
+        ("shows", "GET", "/shows", None),
+        ("show_venue", "GET", "/venues/1", None),
+        ("show_artist", "GET", "/artists/1", None),
+        ("search_venues", "POST", "/venues/search", {"search_term": "velvet"}),
+        ("search_artists", "POST", "/artists/search", {"search_term": "band"}),
+        ("create_venue_form", "GET", "/venues/create", None),
+        ("create_artist_form", "GET", "/artists/create", None),
+        ("create_shows", "GET", "/shows/create", None),
+    ]
+    if next_cursor:
+        result.insert(4, ("shows: next page", "GET", next_cursor, None))
+    return result
+
+
+def _request(client, method, path, data):
+    if method == "POST":
+        return client.post(path, data=data)
+    return client.get(path)
+
+
+def measure(app, db, iterations):
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_query)
+    client = app.test_client()
+    results = {}
+    try:
+        for name, method, path, data in routes(client):
+            # Warm up template compilation and connection pool.
+            response = _request(client, method, path, data)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} answered {response.status_code}")
+
+            latencies = []
+            del queries[:]
+            for _ in range(iterations):
+                start = time.perf_counter()
+                _request(client, method, path, data)
+                latencies.append((time.perf_counter() - start) * 1000)
+            n_queries = len(queries) / iterations
+            p50, p90, p99 = percentiles(latencies, [50, 90, 99])
+
+            # Memory is measured on a separate run, tracemalloc slows everything down.
+            tracemalloc.start()
+            response = _request(client, method, path, data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                "path": path,
+                "p50_ms": round(p50, 3),
+                "p90_ms": round(p90, 3),
+                "p99_ms": round(p99, 3),
+                "mean_ms": round(statistics.mean(latencies), 3),
+                "queries": n_queries,
+                "peak_kib": round(peak / 1024, 1),
+                "response_kib": round(len(response.data) / 1024, 1),
+            }
+            print(
+                f"  {name:<20} p50 {results[name]['p50_ms']:>9.2f} ms"
+                f"  p99 {results[name]['p99_ms']:>9.2f} ms"
+                f"  {n_queries:>5.1f} queries  {results[name]['peak_kib']:>9.1f} KiB"
+            )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_query)
+    return results
+
+
+def compare(results, baseline):
+    print("\nComparison with baseline (p50 / p99 / queries):")
+    for size, routes_ in results.items():
+        base_routes = baseline.get("results", {}).get(size)
+        if base_routes is None:
+            print(f"  size {size}: not in baseline")
+            continue
+        print(f"  size {size}:")
+        for name, r in routes_.items():
+            b = base_routes.get(name)
+            if b is None:
+                continue
+            deltas = [
+                f"{(r[key] - b[key]) / b[key] * 100:+.0f}%" if b[key] else "n/a"
+                for key in ("p50_ms", "p99_ms")
+            ]
+            print(
+                f"    {name:<20} p50 {deltas[0]:>6}  p99 {deltas[1]:>6}"
+                f"  queries {b['queries']:g} -> {r['queries']:g}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every route of the app.")
+    parser.add_argument(
+        "--database-url",
+        required=True,
+        help="scratch database to benchmark against; its data is deleted",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,100000,1000000",
+        help="comma separated numbers of shows to seed",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this previous JSON output")
+    parser.add_argument(
+        "--no-seed",
+        action="store_true",
+        help="benchmark the data already in the database (single size)",
+    )
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db
+    from flask_migrate import upgrade
+
+    app = create_app(
+        {"SQLALCHEMY_DATABASE_URI": args.database_url, "WTF_CSRF_ENABLED": False},
+        migrations=True,
+    )
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.no_seed:
+        sizes = sizes[:1]
+
+    results = {}
+    with app.app_context():
+        upgrade()
+        for size in sizes:
+            if not args.no_seed:
+                started = time.perf_counter()
+                counts = seed(db, size)
+                print(
+                    f"Seeded {counts['venues']} venues, {counts['artists']} "
+                    f"artists, {size} shows in {time.perf_counter() - started:.1f}s"
+                )
+            results[str(size)] = measure(app, db, args.iterations)
+
+    output = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "iterations": args.iterations,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
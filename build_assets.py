@@ -0,0 +1,193 @@
+# Builds the fingerprinted static assets served by assets.py:
+#
+#   $ python build_assets.py            # writes static/dist/
+#
+# Every file of static/ is copied to static/dist/ under a name carrying a hash
+# of its content, with the url()s of stylesheets pointing to the copies. The
+# bundles of assets.BUNDLES are concatenated and minified, with rcssmin and
+# rjsmin when they are installed (stylesheets otherwise get a simpler built-in
+# minification, scripts none: the libraries are minified already).
+# Text files get a gzip variant, and a brotli one when the brotli package is
+# installed, kept only when smaller. The manifest maps each file and bundle to
+# its copy.
+#
+# Files of previous builds are left in place, so that pages rendered before a
+# deploy (and cached by browsers) keep working.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from assets import BUNDLES, DIST_DIR, MANIFEST
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".json", ".txt", ".eot", ".ttf", ".otf"}
+# Variants must save at least this fraction of the size to be worth serving.
+MIN_SAVING = 0.05
+
+_CSS_STRING = r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+_CSS_COMMENTS = re.compile(_CSS_STRING + r"|/\*(?!!).*?\*/", re.S)
+_CSS_STRINGS = re.compile(_CSS_STRING)
+_CSS_PUNCTUATION = re.compile(r" ?([{};,>]) ?")
+_CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+
+
+def minify_css(css):
+    if rcssmin is not None:
+        return rcssmin.cssmin(css, keep_bang_comments=True)
+    # Drops comments (but /*! license */ ones) and collapses whitespace outside
+    # of strings. Spaces around ":" are kept, as in "a :hover".
+    css = _CSS_COMMENTS.sub(lambda match: match.group(1) or "", css)
+    parts = _CSS_STRINGS.split(css)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r"\s+", " ", parts[i])
+        parts[i] = _CSS_PUNCTUATION.sub(r"\1", code).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(js):
+    if rjsmin is None:
+        return js
+    return rjsmin.jsmin(js, keep_bang_comments=True)
+
+
+def fingerprint(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def rewrite_css_urls(css, source, target, manifest):
+    # url()s of a stylesheet are relative to its own location: resolve them
+    # from the `source` file, then point them to the fingerprinted copies from
+    # the location of `target`, or to the original files when not copied.
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        path, sep, fragment = (re.split(r"([?#])", url, maxsplit=1) + ["", ""])[:3]
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if resolved in manifest:
+            new = posixpath.relpath(manifest[resolved], posixpath.dirname(target))
+        else:
+            new = "/static/" + resolved
+        return f"url({quote}{new}{sep}{fragment}{quote})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+def write(dist, path, content):
+    full_path = os.path.join(dist, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as f:
+        f.write(content)
+    if posixpath.splitext(path)[1] not in COMPRESSIBLE:
+        return
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content)))
+    for suffix, compressed in variants:
+        if len(compressed) <= len(content) * (1 - MIN_SAVING):
+            with open(full_path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def static_files(static):
+    for directory, dirnames, filenames in os.walk(static):
+        dirnames[:] = sorted(d for d in dirnames if d != DIST_DIR)
+        for filename in sorted(filenames):
+            if filename.startswith("."):
+                continue
+            full_path = os.path.join(directory, filename)
+            yield os.path.relpath(full_path, static).replace(os.sep, "/")
+
+
+def build(static):
+    dist = os.path.join(static, DIST_DIR)
+    manifest = {}
+    contents = {}
+    for path in static_files(static):
+        with open(os.path.join(static, path), "rb") as f:
+            contents[path] = f.read()
+
+    # Stylesheets refer to other files, which are fingerprinted first.
+    ordered = sorted(contents, key=lambda path: path.endswith(".css"))
+    for path in ordered:
+        content = contents[path]
+        if path.endswith(".css"):
+            # The copy stays in the same directory, relative to dist/.
+            content = rewrite_css_urls(
+                content.decode("utf-8"), path, path, manifest
+            ).encode("utf-8")
+        manifest[path] = fingerprint(path, content)
+        write(dist, manifest[path], content)
+
+    for bundle, sources in BUNDLES.items():
+        kind = posixpath.splitext(bundle)[1]
+        target = posixpath.join(kind.lstrip("."), bundle)
+        if kind == ".css":
+            text = "\n".join(
+                rewrite_css_urls(contents[s].decode("utf-8"), s, target, manifest)
+                for s in sources
+            )
+            text = minify_css(text)
+        else:
+            # Separated by ";" in case a file does not end with one.
+            text = ";\n".join(contents[s].decode("utf-8") for s in sources)
+            text = minify_js(text)
+        content = text.encode("utf-8")
+        manifest[bundle] = fingerprint(target, content)
+        write(dist, manifest[bundle], content)
+
+    with open(os.path.join(dist, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static assets.")
+    parser.add_argument(
+        "--static",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"),
+        help="static folder of the app",
+    )
+    args = parser.parse_args()
+    manifest = build(args.static)
+    for bundle in BUNDLES:
+        path = os.path.join(args.static, DIST_DIR, manifest[bundle])
+        sizes = [os.path.getsize(path)] + [
+            os.path.getsize(path + suffix) if os.path.exists(path + suffix) else None
+            for suffix in (".gz", ".br")
+        ]
+        print(
+            f"{manifest[bundle]:<32} {sizes[0]:>8} B"
+            + "".join(
+                f"  {name} {size:>7} B"
+                for name, size in zip(("gz", "br"), sizes[1:])
+                if size
+            )
+        )
+    print(f"{len(manifest)} files written to {os.path.join(args.static, DIST_DIR)}.")
+
+
+if __name__ == "__main__":
+    main()
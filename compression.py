@@ -0,0 +1,244 @@
+# Response compression, as WSGI middleware around the app.
+# Text responses (COMPRESSION_MIMETYPES) are compressed with brotli, when the
+# brotli package is installed and the client prefers it, or gzip, as negotiated
+# from Accept-Encoding, and always carry "Vary: Accept-Encoding" so that caches
+# keep the variants apart. Responses already encoded (e.g. the precompressed
+# assets, see assets.py), partial or marked no-transform are left alone.
+#
+# Responses of a known length under COMPRESSION_MIN_SIZE bytes are sent as is,
+# the others are compressed in one go, with their compressed Content-Length.
+# Streamed responses (no Content-Length, e.g. the exports) are buffered up to
+# COMPRESSION_MIN_SIZE bytes to decide, then compressed chunk by chunk, each
+# chunk flushed so that the client receives it without waiting for the next.
+#
+# A compressed response is not byte-identical to the original, so its ETag is
+# weakened; conditional.py compares ETags weakly.
+import zlib
+from itertools import chain
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_options_header
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MIMETYPES = (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+# Responses of a known length up to this size are compressed in memory, to send
+# their compressed length; larger ones are streamed.
+MAX_BUFFERED_SIZE = 1024 * 1024
+
+
+def _weaken_etag(headers):
+    etag = headers.get("ETag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+class _Encoder:
+    def __init__(self, encoding, level, brotli_quality):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress = self._compressor.process
+            self.flush = self._compressor.flush
+            self.finish = self._compressor.finish
+        else:
+            # wbits 16 + MAX_WBITS writes a gzip header and trailer.
+            self._compressor = zlib.compressobj(
+                level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            self.compress = self._compressor.compress
+            self.flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._compressor.flush
+
+
+class _Response:
+    # The state of one response going through the middleware: `start_response`
+    # holds the headers back until the body tells whether to compress it.
+
+    def __init__(self, middleware, encoding, if_none_match, start_response):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self._start_response = start_response
+        self.status = None
+        self.headers = None
+        self.mode = None
+        self.length = None
+        self.started = False
+        self.written = []
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info is not None and self.started:
+            # Too late to change the response: let the server deal with it.
+            return self._start_response(status, headers, exc_info)
+        self.status = status
+        self.headers = Headers(headers)
+        self.mode = self._choose_mode()
+        if self.mode == "pass":
+            return self._start(self.headers)
+        return self.written.append
+
+    def _choose_mode(self):
+        code = int(self.status.split(None, 1)[0])
+        etag = self.headers.get("ETag")
+        if code == 304 and etag is not None and "W/" + etag in self.if_none_match:
+            # Revalidation of a compressed response: keep its weakened ETag.
+            _weaken_etag(self.headers)
+        mimetype, _ = parse_options_header(self.headers.get("Content-Type", ""))
+        if (
+            code < 200
+            or code in (204, 206, 304)
+            or "Content-Encoding" in self.headers
+            or "Content-Range" in self.headers
+            or mimetype not in self.middleware.mimetypes
+            or "no-transform" in self.headers.get("Cache-Control", "")
+        ):
+            return "pass"
+        # Whether compressed or not, the response depends on Accept-Encoding.
+        vary = [v.strip() for v in self.headers.get("Vary", "").split(",") if v.strip()]
+        if "*" not in vary and "accept-encoding" not in (v.lower() for v in vary):
+            self.headers["Vary"] = ", ".join(vary + ["Accept-Encoding"])
+        if self.encoding is None:
+            return "pass"
+        length = self.headers.get("Content-Length")
+        if length is None:
+            return "stream"
+        self.length = int(length)
+        if self.length < self.middleware.min_size:
+            return "pass"
+        return "buffer" if self.length <= MAX_BUFFERED_SIZE else "stream"
+
+    def _start(self, headers):
+        self.started = True
+        return self._start_response(self.status, list(headers.items()))
+
+    def _compressed_headers(self, length=None):
+        headers = self.headers.copy()
+        headers["Content-Encoding"] = self.encoding
+        headers.remove("Content-Length")
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        _weaken_etag(headers)
+        return headers
+
+    def body(self, app_iter):
+        chunks = self._chunks(app_iter)
+        # Applications may call start_response as late as their first chunk.
+        first = next(chunks, None)
+        if first is not None:
+            chunks = chain((first,), chunks)
+        if self.mode == "pass":
+            yield from chunks
+        elif self.mode == "buffer":
+            yield self._compress_buffered(chunks)
+        else:
+            yield from self._compress_stream(chunks)
+
+    def _chunks(self, app_iter):
+        # Data passed to write() comes before the iterable's.
+        yield from self.written
+        self.written = []
+        for chunk in app_iter:
+            if chunk:
+                yield chunk
+
+    def _compress_buffered(self, chunks):
+        encoder = self.middleware.encoder(self.encoding)
+        data = b"".join(encoder.compress(chunk) for chunk in chunks) + encoder.finish()
+        self._start(self._compressed_headers(len(data)))
+        return data
+
+    def _compress_stream(self, chunks):
+        # The first chunks are read until COMPRESSION_MIN_SIZE bytes, to send
+        # short responses of an unknown length as they are.
+        head = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= self.middleware.min_size:
+                break
+        else:
+            if self.length is None:
+                self.headers["Content-Length"] = str(size)
+            self._start(self.headers)
+            yield b"".join(head)
+            return
+
+        self._start(self._compressed_headers())
+        encoder = self.middleware.encoder(self.encoding)
+        data = b"".join(encoder.compress(chunk) for chunk in head) + encoder.flush()
+        yield data
+        for chunk in chunks:
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        min_size=500,
+        level=6,
+        brotli_quality=4,
+        mimetypes=DEFAULT_MIMETYPES,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+        # By order of preference, for equal qualities.
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, environ):
+        accept = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        quality, _, encoding = max(
+            (accept.quality(encoding), -i, encoding)
+            for i, encoding in enumerate(self.encodings)
+        )
+        return encoding if quality > 0 else None
+
+    def encoder(self, encoding):
+        return _Encoder(encoding, self.level, self.brotli_quality)
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if environ.get("REQUEST_METHOD") != "HEAD":
+            encoding = self.negotiate(environ)
+        response = _Response(
+            self, encoding, environ.get("HTTP_IF_NONE_MATCH", ""), start_response
+        )
+        app_iter = self.app(environ, response.start_response)
+        return ClosingIterator(
+            response.body(app_iter), getattr(app_iter, "close", None)
+        )
+
+
+def init_compression(app):
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config.get("COMPRESSION_MIN_SIZE", 500),
+        level=app.config.get("COMPRESSION_LEVEL", 6),
+        brotli_quality=app.config.get("COMPRESSION_BROTLI_QUALITY", 4),
+        mimetypes=app.config.get("COMPRESSION_MIMETYPES", DEFAULT_MIMETYPES),
+    )
@@ -0,0 +1,71 @@
+# Conditional GET for the read routes.
+# Every write statement on Venue, Artist or Show bumps that table's row in
+# TableVersion (by a trigger, so all processes and write paths agree). A read
+# route declares the tables it renders; its ETag is derived from their versions,
+# so a revalidating client gets a 304 after a single primary key lookup, before
+# the view runs any query.
+# There is no Last-Modified: HTTP dates have a one second resolution, so a page
+# fetched in the second of a write would be revalidated by If-Modified-Since
+# forever after. Clients revalidate with the ETag.
+import hashlib
+import time
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from models import db, TableVersion
+
+
+def table_versions_query(tables):
+    return (
+        db.session.query(TableVersion.name, TableVersion.version)
+        .filter(TableVersion.name.in_(tables))
+        .order_by(TableVersion.name)
+    )
+
+
+def make_etag(versions, time_dependent):
+    # The ETag of a page rendering tables at `versions`.
+    parts = [current_app.config.get("ETAG_SALT", "")]
+    parts.extend(f"{name}:{version}" for name, version in versions)
+    if time_dependent:
+        # Pages splitting past and upcoming shows change as time goes by.
+        bucket = current_app.config.get("CONDITIONAL_GET_TIME_BUCKET", 300)
+        parts.append(str(int(time.time() // bucket)))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def is_not_modified(etag, if_none_match):
+    # Weak comparison, as compression may weaken the ETag on the way out.
+    return bool(if_none_match) and if_none_match.contains_weak(etag)
+
+
+def conditional(*tables, time_dependent=False):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pages carrying a flashed message must be rendered to show it. The
+            # session is only tested for the key: reading it would mark it
+            # accessed, and every response `Vary: Cookie`.
+            enabled = current_app.config.get("CONDITIONAL_GET_ENABLED", True)
+            if not enabled or "_flashes" in session:
+                return view(*args, **kwargs)
+
+            versions = table_versions_query(tables).all()
+            etag = make_etag(versions, time_dependent)
+            if is_not_modified(etag, request.if_none_match):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers and proxies store the page, but revalidate each time.
+            response.cache_control.no_cache = True
+            return response
+
+        # Read by asgi.py, which serves some of these routes itself.
+        wrapper.conditional_tables = (tables, time_dependent)
+        return wrapper
+
+    return decorator
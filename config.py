@@ -12,3 +12,113 @@ DEBUG = True
 # TODO IMPLEMENT DATABASE URL
 SQLALCHEMY_DATABASE_URI = "postgres://kzinmr@localhost:5432/fyyurr"
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool profiles (see dbpool.py). App servers use "web"; run imports,
+# exports and other long jobs with FYYUR_DB_POOL_PROFILE=batch. Connections are
+# recycled after pool_recycle seconds and checked with a ping before use; a
+# checkout fails after waiting pool_timeout seconds, a statement after
+# statement_timeout_ms milliseconds (0 to disable).
+DB_POOL_PROFILE = os.environ.get("FYYUR_DB_POOL_PROFILE", "web")
+DB_POOL_PROFILES = {
+    "web": {
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 5000,
+    },
+    "batch": {
+        "pool_size": 2,
+        "max_overflow": 0,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 0,
+    },
+}
+# Serve the live pool statistics at /_debug/pool outside of debug mode too.
+DB_POOL_STATS_ENDPOINT = False
+# Connections of the asyncpg pool of each ASGI worker (see asgi.py). It uses the
+# statement timeout of the "web" profile.
+ASYNC_DB_POOL_SIZE = 10
+
+# Read replicas (see routing.py), as a comma separated FYYUR_REPLICA_URIS. GET
+# requests read from a replica at most REPLICA_MAX_LAG_SECONDS behind, checked
+# every REPLICA_CHECK_INTERVAL seconds; a client which has just written reads
+# from the primary for REPLICA_STICKY_SECONDS.
+SQLALCHEMY_REPLICA_URIS = [
+    uri for uri in os.environ.get("FYYUR_REPLICA_URIS", "").split(",") if uri
+]
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_STICKY_SECONDS = 10
+
+# Number of rows per page on the /venues, /artists and /shows listings.
+# Clients may ask for another size with ?per_page=, up to LISTING_MAX_PAGE_SIZE.
+LISTING_PAGE_SIZE = 50
+LISTING_MAX_PAGE_SIZE = 500
+
+# Venue/artist search returns at most SEARCH_RESULT_LIMIT rows ranked by similarity,
+# and counts matches up to SEARCH_COUNT_CAP (displayed as "1000+" beyond that).
+SEARCH_RESULT_LIMIT = 50
+SEARCH_COUNT_CAP = 1000
+
+# Rendered listing tiles are cached per worker process on the versions of the
+# rows they show (see fragments.py), with at most FRAGMENT_CACHE_SIZE entries
+# kept for at most FRAGMENT_CACHE_TIMEOUT seconds.
+FRAGMENT_CACHE_ENABLED = True
+FRAGMENT_CACHE_SIZE = 10000
+FRAGMENT_CACHE_TIMEOUT = 300
+
+# ETags of the read routes are derived from per-table versions (see conditional.py).
+# Set FYYUR_RELEASE on deploy so that template changes also change the ETags.
+CONDITIONAL_GET_ENABLED = True
+ETAG_SALT = os.environ.get("FYYUR_RELEASE", "")
+# Detail pages split past and upcoming shows, so their ETags also expire after this many seconds.
+CONDITIONAL_GET_TIME_BUCKET = 300
+
+# Bulk imports (see importer.py) insert IMPORT_BATCH_SIZE rows per transaction and
+# report at most IMPORT_MAX_ERRORS rejected rows in detail.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
+
+# Exports (see exporter.py) fetch and send EXPORT_CHUNK_SIZE rows at a time.
+EXPORT_CHUNK_SIZE = 1000
+
+# Every request reports its SQL queries in a Server-Timing header (see
+# instrumentation.py). A warning is logged when a request runs more than
+# SQL_QUERY_BUDGET queries, or the same statement SQL_REPEATED_STATEMENT_THRESHOLD
+# times. /_debug/sql lists the last SQL_DEBUG_HISTORY requests in debug mode, or
+# when SQL_DEBUG_ENDPOINT is set.
+SQL_INSTRUMENTATION_ENABLED = True
+SQL_QUERY_BUDGET = 20
+SQL_REPEATED_STATEMENT_THRESHOLD = 5
+SQL_SLOWEST_STATEMENTS = 5
+SQL_DEBUG_HISTORY = 50
+SQL_DEBUG_ENDPOINT = False
+
+# Prometheus metrics at /metrics, when prometheus_client is installed (see
+# metrics.py). Multi-process servers need PROMETHEUS_MULTIPROC_DIR set.
+METRICS_ENABLED = True
+
+# Built static assets (see assets.py and build_assets.py) are served under
+# ASSETS_URL_PATH, cached by browsers and proxies for ASSETS_MAX_AGE seconds:
+# their names change with their content.
+ASSETS_URL_PATH = "/assets"
+ASSETS_MAX_AGE = 31536000
+
+# Text responses of COMPRESSION_MIN_SIZE bytes or more are compressed with gzip
+# at COMPRESSION_LEVEL (1-9), or brotli at COMPRESSION_BROTLI_QUALITY (0-11)
+# when the brotli package is installed (see compression.py).
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 500
+COMPRESSION_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Batch deletes of venues and artists (see deletion.py) take at most this many ids.
+BATCH_DELETE_MAX_IDS = 1000
+
+# Genre counts (see genres.py) are cached per process for at most
+# GENRE_FACET_CACHE_SIZE combinations of requested genres.
+GENRE_FACET_CACHE_SIZE = 256
@@ -0,0 +1,145 @@
+# Double-booking detection.
+# A show occupies its venue and its artist from start_time for duration_minutes.
+# `find_conflicts` checks any number of proposed slots in a single query: the
+# slots are sent as arrays and unnested, then each is joined to the shows of
+# the same venue or artist whose slot overlaps it, through the GiST indexes of
+# Show (see models.py). Proposed slots are also checked against the earlier
+# ones of the same call, so that a bulk import cannot book a venue twice.
+#
+# Checking then inserting is not atomic: two requests booking the same venue at
+# the same moment may both pass. The schedules may already overlap, which rules
+# out an exclusion constraint.
+from collections import namedtuple
+
+from sqlalchemy import and_, bindparam, literal, null, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models import db, show_slot, Show
+
+
+Slot = namedtuple("Slot", ["venue_id", "artist_id", "start_time", "duration_minutes"])
+# `position` is the index of the proposed slot. `show_id` is the booked show it
+# overlaps, or None for an earlier proposed slot, at `other_position`.
+Conflict = namedtuple(
+    "Conflict",
+    ["position", "resource", "show_id", "other_position", "start_time", "end_time"],
+)
+
+_PROPOSED = (
+    db.text(
+        "SELECT * FROM unnest(:venue_ids, :artist_ids, :start_times, :durations)"
+        " WITH ORDINALITY AS slot(venue_id, artist_id, start_time,"
+        " duration_minutes, position)"
+    )
+    .bindparams(
+        bindparam("venue_ids", type_=ARRAY(db.Integer)),
+        bindparam("artist_ids", type_=ARRAY(db.Integer)),
+        bindparam("start_times", type_=ARRAY(db.TIMESTAMP)),
+        bindparam("durations", type_=ARRAY(db.Integer)),
+    )
+    .columns(
+        venue_id=db.Integer,
+        artist_id=db.Integer,
+        start_time=db.TIMESTAMP,
+        duration_minutes=db.Integer,
+        position=db.BigInteger,
+    )
+)
+
+
+def _end_time(start_time, duration_minutes):
+    return (
+        start_time + duration_minutes * db.literal_column("interval '1 minute'")
+    ).label("end_time")
+
+
+def conflicts_query():
+    slots = _PROPOSED.cte("proposed")
+    proposed = slots.alias("p")
+    earlier = slots.alias("q")
+    shows = Show.__table__
+    proposed_slot = show_slot(proposed.c.start_time, proposed.c.duration_minutes)
+    queries = []
+    for resource in ("venue", "artist"):
+        column = f"{resource}_id"
+        queries.append(
+            db.select(
+                [
+                    proposed.c.position,
+                    literal(resource).label("resource"),
+                    shows.c.id.label("show_id"),
+                    null().label("other_position"),
+                    shows.c.start_time,
+                    _end_time(shows.c.start_time, shows.c.duration_minutes),
+                ]
+            ).select_from(
+                proposed.join(
+                    shows,
+                    and_(
+                        shows.c[column] == proposed.c[column],
+                        show_slot(shows.c.start_time, shows.c.duration_minutes).op(
+                            "&&"
+                        )(proposed_slot),
+                    ),
+                )
+            )
+        )
+        queries.append(
+            db.select(
+                [
+                    proposed.c.position,
+                    literal(resource),
+                    null(),
+                    earlier.c.position,
+                    earlier.c.start_time,
+                    _end_time(earlier.c.start_time, earlier.c.duration_minutes),
+                ]
+            ).select_from(
+                proposed.join(
+                    earlier,
+                    and_(
+                        earlier.c.position < proposed.c.position,
+                        earlier.c[column] == proposed.c[column],
+                        show_slot(earlier.c.start_time, earlier.c.duration_minutes).op(
+                            "&&"
+                        )(proposed_slot),
+                    ),
+                )
+            )
+        )
+    return union_all(*queries)
+
+
+def find_conflicts(slots):
+    # Returns the conflicts of `slots`, a sequence of Slot, ordered by position.
+    if not slots:
+        return []
+    params = {
+        "venue_ids": [slot.venue_id for slot in slots],
+        "artist_ids": [slot.artist_id for slot in slots],
+        "start_times": [slot.start_time for slot in slots],
+        "durations": [slot.duration_minutes for slot in slots],
+    }
+    rows = db.session.execute(conflicts_query(), params).fetchall()
+    # WITH ORDINALITY counts from 1.
+    conflicts = [
+        Conflict(
+            row[0] - 1,
+            row[1],
+            row[2],
+            None if row[3] is None else row[3] - 1,
+            row[4],
+            row[5],
+        )
+        for row in rows
+    ]
+    conflicts.sort(key=lambda conflict: (conflict.position, conflict.start_time))
+    return conflicts
+
+
+def describe(conflict):
+    what = "another show" if conflict.show_id is None else f"show {conflict.show_id}"
+    return (
+        f"The {conflict.resource} is already booked from {conflict.start_time:%Y-%m-%d %H:%M}"
+        f" to {conflict.end_time:%Y-%m-%d %H:%M} ({what})."
+    )
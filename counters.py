@@ -0,0 +1,49 @@
+# Upcoming-show counters.
+# Venue.upcoming_shows_count and Artist.upcoming_shows_count are maintained by
+# triggers on Show (see migration 3f0c2a91d7b4): a show counts as upcoming
+# while Show.is_upcoming is set. Shows do not stop being upcoming on their own,
+# so `rollover_past_shows` has to be run periodically, e.g. from cron:
+#
+#   */5 * * * * cd /path/to/fyyur && FLASK_APP=app.py flask rollover-shows
+#
+# Between two rollovers, a show which has just started may still be counted.
+from models import db, Venue, Artist, Show
+
+
+def rollover_past_shows():
+    # The counter triggers decrement the venues and artists of the updated rows.
+    # Most runs find nothing to roll over: they then write nothing, so that the
+    # table versions, hence ETags and cached pages, are left alone.
+    nowtime = db.func.timezone("utc", db.func.now())
+    past_shows = db.session.query(Show).filter(
+        Show.is_upcoming, Show.start_time <= nowtime
+    )
+    if not db.session.query(past_shows.exists()).scalar():
+        db.session.rollback()
+        return 0
+    n_shows = past_shows.update({Show.is_upcoming: False}, synchronize_session=False)
+    db.session.commit()
+    return n_shows
+
+
+def num_upcoming_shows(model):
+    # The counter, as listings and searches return it. It is only as fresh as
+    # the last rollover, unlike the upcoming_shows_count of the detail pages,
+    # counted when they are read (see loaders.py), hence a name of its own.
+    return model.upcoming_shows_count.label("num_upcoming_shows")
+
+
+def recompute_upcoming_counters():
+    # Rebuilds every counter from scratch, e.g. after loading data with the
+    # triggers disabled. Rolls over past shows first.
+    rollover_past_shows()
+    for model, fk_column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        n_upcoming = (
+            db.session.query(db.func.count(Show.id))
+            .filter(fk_column == model.id, Show.is_upcoming)
+            .as_scalar()
+        )
+        db.session.query(model).update(
+            {model.upcoming_shows_count: n_upcoming}, synchronize_session=False
+        )
+    db.session.commit()
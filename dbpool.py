@@ -0,0 +1,109 @@
+# Connection pool of the app's engine.
+# The pool is configured from a profile of DB_POOL_PROFILES, selected with
+# DB_POOL_PROFILE: "web" for the app servers (many short requests, fail fast
+# when the database is saturated) and "batch" for imports, exports and other
+# long jobs (few connections, no statement timeout).
+#
+# TimedQueuePool is SQLAlchemy's default QueuePool, keeping statistics on its
+# checkouts: how many threads are waiting, for how long, and how many gave up.
+# The live state of the pool is served at /_debug/pool in debug mode or when
+# DB_POOL_STATS_ENDPOINT is set, and exported in metrics.py.
+import threading
+import time
+
+from flask import abort, current_app, jsonify
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+_wait_observers = []
+
+
+def observe_checkout_wait(observer):
+    # `observer(seconds)` is called after every checkout of a connection,
+    # including those which timed out.
+    if observer not in _wait_observers:
+        _wait_observers.append(observer)
+
+
+class TimedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        with self._stats_lock:
+            self.waiting += 1
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started_at
+            with self._stats_lock:
+                self.waiting -= 1
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                self.timeouts += timed_out
+            for observer in _wait_observers:
+                observer(waited)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": max(0, self.overflow()),
+                "max_overflow": self._max_overflow,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "wait_total_s": round(self.wait_total, 6),
+                "wait_max_s": round(self.wait_max, 6),
+                "timeouts": self.timeouts,
+            }
+
+
+def engine_options(profile):
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": profile.get("pool_size", 5),
+        "max_overflow": profile.get("max_overflow", 10),
+        "pool_timeout": profile.get("pool_timeout", 30),
+        "pool_recycle": profile.get("pool_recycle", -1),
+        "pool_pre_ping": profile.get("pool_pre_ping", False),
+    }
+    statement_timeout = profile.get("statement_timeout_ms")
+    if statement_timeout:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={int(statement_timeout)}"
+        }
+    return options
+
+
+def pool_stats_view():
+    if not (current_app.debug or current_app.config.get("DB_POOL_STATS_ENDPOINT")):
+        abort(404)
+    pool = current_app.extensions["sqlalchemy"].db.engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        abort(404)
+    return jsonify(profile=current_app.config.get("DB_POOL_PROFILE"), **pool.stats())
+
+
+def init_pool(app):
+    # Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS override the profile.
+    profile_name = app.config.get("DB_POOL_PROFILE", "web")
+    profile = app.config.get("DB_POOL_PROFILES", {}).get(profile_name, {})
+    options = engine_options(profile)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    app.add_url_rule("/_debug/pool", "pool_stats", pool_stats_view)
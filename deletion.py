@@ -0,0 +1,38 @@
+# Deleting venues and artists.
+# Show's foreign keys cascade on delete in the database, so removing a venue or
+# an artist is a single DELETE statement however many shows it had: the ORM
+# neither loads nor deletes them one by one (see the passive_deletes backrefs in
+# models.py). The Show triggers keep the upcoming shows counters and the table
+# versions right, as for any other delete.
+from flask import abort, current_app
+from sqlalchemy import any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models import db
+
+
+def parse_ids(values):
+    # Ids of a batch delete, from a JSON list.
+    limit = current_app.config.get("BATCH_DELETE_MAX_IDS", 1000)
+    if not isinstance(values, list) or not values:
+        abort(400, "Expected a non-empty list of ids.")
+    if len(values) > limit:
+        abort(400, f"At most {limit} ids can be deleted at once.")
+    # Not bool, float or str, whose int() would delete a row by mistake.
+    if any(type(value) is not int for value in values):
+        abort(400, "Ids must be integers.")
+    return sorted(set(values))
+
+
+def delete_by_ids(model, ids):
+    # Deletes the `model` rows of `ids`, with their shows, and returns the
+    # (id, name) of those which existed. The ids are sent as a single array
+    # parameter, so the statement is the same whatever their number.
+    statement = (
+        model.__table__.delete()
+        .where(model.id == any_(bindparam("ids", type_=ARRAY(db.Integer))))
+        .returning(model.id, model.name)
+    )
+    deleted = db.session.execute(statement, {"ids": list(ids)}).fetchall()
+    db.session.commit()
+    return deleted
@@ -0,0 +1,76 @@
+# Streaming export of the shows, with their venue and artist names, as CSV or
+# NDJSON. Rows are fetched through a server-side cursor EXPORT_CHUNK_SIZE at a
+# time and written out chunk by chunk, so an export of any size runs in flat
+# memory and its first bytes go out as soon as the first chunk is fetched.
+#
+#   $ curl -O http://localhost:5000/shows.csv
+#   $ FLASK_APP=app.py flask export-shows --format ndjson --output shows.ndjson
+import csv
+import datetime
+import io
+import json
+
+from flask import current_app
+
+from listings import shows_listing_query, SHOW_LISTING_KEYS
+
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def shows_export_query(chunk_size):
+    return (
+        shows_listing_query()
+        .order_by(*SHOW_LISTING_KEYS)
+        .yield_per(chunk_size)
+        .execution_options(stream_results=True)
+    )
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def export_csv(query, chunk_size):
+    columns = [c["name"] for c in query.column_descriptions]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(query, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(query, chunk_size):
+    columns = [c["name"] for c in query.column_descriptions]
+    for chunk in _chunks(query, chunk_size):
+        yield "".join(
+            json.dumps({k: _json_value(v) for k, v in zip(columns, row)}) + "\n"
+            for row in chunk
+        )
+
+
+EXPORTERS = {"csv": export_csv, "ndjson": export_ndjson}
+
+
+def export_shows(fmt, chunk_size=None):
+    # Yields the export as text chunks; consume it within the app context.
+    if chunk_size is None:
+        chunk_size = current_app.config.get("EXPORT_CHUNK_SIZE", 1000)
+    return EXPORTERS[fmt](shows_export_query(chunk_size), chunk_size)
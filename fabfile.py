@@ -5,14 +5,23 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    # Runs tests/ against a throwaway database, see tests/conftest.py.
     with settings(warn_only=True):
-        result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
-        )
+        result = local("python -m pytest", capture=True)
+    print(result)
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
 
+def check_plans():
+    # EXPLAINs the hot queries against the local database, see plancheck.py.
+    with settings(warn_only=True):
+        result = local("FLASK_APP=app.py flask check-plans", capture=True)
+    print(result)
+    if result.failed and not confirm("Query plans regressed. Continue?"):
+        abort("Aborted at user request.")
+
+
 def commit():
     message = input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -24,6 +33,7 @@ def push():
 
 def prepare():
     test()
+    check_plans()
     commit()
     push()
 
@@ -39,16 +49,12 @@ def heroku():
     local("git push heroku master")
 
 
-def heroku_test():
-    local("heroku run python test_tasks.py -v && heroku run python test_users.py -v")
-
-
 def deploy():
     pull()
     test()
+    check_plans()
     commit()
     heroku()
-    heroku_test()
 
 
 # rollback
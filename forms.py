@@ -6,15 +6,35 @@ from wtforms import (
     SelectMultipleField,
     DateTimeField,
     BooleanField,
+    IntegerField,
 )
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import (
+    DataRequired,
+    InputRequired,
+    AnyOf,
+    URL,
+    Optional,
+    NumberRange,
+)
+
+from models import DEFAULT_SHOW_DURATION_MINUTES
 
 
 class ShowForm(FlaskForm):
-    artist_id = StringField("artist_id", validators=[DataRequired()])
-    venue_id = StringField("venue_id", validators=[DataRequired()])
+    artist_id = IntegerField("artist_id", validators=[DataRequired()])
+    venue_id = IntegerField("venue_id", validators=[DataRequired()])
+    # InputRequired, as the default would otherwise stand in for a missing value.
     start_time = DateTimeField(
-        "start_time", validators=[DataRequired()], default=datetime.today()
+        "start_time", validators=[InputRequired()], default=datetime.today()
+    )
+    # Left empty, the show gets the default duration.
+    duration_minutes = IntegerField(
+        "duration_minutes",
+        validators=[Optional(), NumberRange(min=1, max=24 * 60)],
+        filters=[
+            lambda value: DEFAULT_SHOW_DURATION_MINUTES if value is None else value
+        ],
+        default=DEFAULT_SHOW_DURATION_MINUTES,
     )
 
 
@@ -102,15 +122,15 @@ class VenueForm(FlaskForm):
     )
     address = StringField("address", validators=[DataRequired()])
     phone = StringField("phone")
-    image_link = StringField("image_link", validators=[URL()])
+    image_link = StringField("image_link", validators=[Optional(), URL()])
     genres = SelectMultipleField(
-        # TODO implement enum restriction
+        # Values are restricted to the choices by the field itself.
         "genres",
-        validators=[DataRequired(), AnyOf(genres_choices)],
+        validators=[DataRequired()],
         choices=[(c, c) for c in genres_choices],
     )
-    facebook_link = StringField("facebook_link", validators=[URL()])
-    website = StringField("website", validators=[URL()])
+    facebook_link = StringField("facebook_link", validators=[Optional(), URL()])
+    website = StringField("website", validators=[Optional(), URL()])
     seeking_talent = BooleanField("seeking_talent")
     seeking_description = StringField("seeking_description")
 
@@ -201,19 +221,19 @@ class ArtistForm(FlaskForm):
         # TODO(?) implement validation logic for state
         "phone"
     )
-    image_link = StringField("image_link", validators=[URL()])
+    image_link = StringField("image_link", validators=[Optional(), URL()])
     genres = SelectMultipleField(
-        # TODO implement enum restriction
+        # Values are restricted to the choices by the field itself.
         "genres",
-        validators=[DataRequired(), AnyOf(genres_choices)],
+        validators=[DataRequired()],
         choices=[(c, c) for c in genres_choices],
     )
     facebook_link = StringField(
         # TODO(?) implement enum restriction
         "facebook_link",
-        validators=[URL()],
+        validators=[Optional(), URL()],
     )
-    website = StringField("website", validators=[URL()])
+    website = StringField("website", validators=[Optional(), URL()])
     seeking_venue = BooleanField("seeking_venue")
     seeking_description = StringField("seeking_description")
 
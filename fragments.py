@@ -0,0 +1,99 @@
+# Fragment cache for templates.
+# A fragment is cached under its name and the values it is rendered from,
+# typically the id and version of every row it shows:
+#
+#   {% cache "show-tile", show.id, show.version, show.venue_version %}
+#     ...
+#   {% endcache %}
+#
+# Rows carry a version, bumped by the database whenever they change (see
+# migration f1d6a8b3c527), and read along with the rows of the page: a write to
+# a row invalidates the fragments showing it and only those, in every worker,
+# and a page is never rendered with fragments older than its rows. Stale entries
+# are never read again and fall out of the bounded LRU.
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCache:
+    def __init__(self, maxsize=10000, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, name, values):
+        return (name,) + tuple(values)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._fragments.get(key)
+            if entry is not None:
+                expires_at, fragment = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._fragments.move_to_end(key)
+                    self.hits += 1
+                    return fragment
+                del self._fragments[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, fragment):
+        expires_at = None
+        if self.timeout:
+            expires_at = time.monotonic() + self.timeout
+        with self._lock:
+            self._fragments[key] = (expires_at, fragment)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+        call = self.call_method("_cache_fragment", [nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cache_fragment(self, args, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = cache.make_key(args[0], args[1:])
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = str(caller())
+            cache.set(key, fragment)
+        return Markup(fragment)
+
+
+def init_fragment_cache(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config.get("FRAGMENT_CACHE_ENABLED", True):
+        app.jinja_env.fragment_cache = FragmentCache(
+            maxsize=app.config.get("FRAGMENT_CACHE_SIZE", 10000),
+            timeout=app.config.get("FRAGMENT_CACHE_TIMEOUT"),
+        )
+    return app.jinja_env.fragment_cache
+
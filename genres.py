@@ -0,0 +1,107 @@
+# Genre filters and facets.
+# Listings and searches take `?genre=Jazz&genre=Blues` to keep the venues or
+# artists having all of these genres: `genres @> ARRAY['Jazz', 'Blues']`, served
+# by the GIN indexes on the genres columns.
+#
+# The facets (number of venues or artists per genre, among those matching the
+# requested genres) are counted by the database and cached in the process,
+# under the version of the table in TableVersion: any write to the table bumps
+# it (see conditional.py), so cached counts are refreshed on the first request
+# after a write, for the price of a primary key lookup on every request.
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, request
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models import db, TableVersion
+
+
+GenreCount = namedtuple("GenreCount", ["genre", "count"])
+
+
+def requested_genres(args=None):
+    if args is None:
+        args = request.args
+    return sorted({genre.strip() for genre in args.getlist("genre") if genre.strip()})
+
+
+def filter_by_genres(query, model, genres):
+    if not genres:
+        return query
+    # The columns are of the generic ARRAY type, which has no contains().
+    genres = db.literal(list(genres), type_=ARRAY(db.String))
+    return query.filter(model.genres.op("@>")(genres))
+
+
+def facets_query(model, genres=()):
+    # Genres of the rows having all of `genres`, most frequent first.
+    matching = filter_by_genres(
+        db.session.query(db.func.unnest(model.genres).label("genre")), model, genres
+    ).subquery()
+    count = db.func.count().label("count")
+    return (
+        db.session.query(matching.c.genre, count)
+        .group_by(matching.c.genre)
+        .order_by(count.desc(), matching.c.genre)
+    )
+
+
+def table_version_query(model):
+    return db.session.query(TableVersion.version).filter(
+        TableVersion.name == model.__tablename__
+    )
+
+
+class FacetCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._facets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        # The counts of `key`, unless they were cached at another version.
+        with self._lock:
+            entry = self._facets.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._facets.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, counts):
+        with self._lock:
+            self._facets[key] = (version, counts)
+            self._facets.move_to_end(key)
+            while len(self._facets) > self.maxsize:
+                self._facets.popitem(last=False)
+
+
+def facet_cache():
+    return current_app.extensions["genre_facets"]
+
+
+def facet_key(model, genres):
+    return model.__tablename__, tuple(genres)
+
+
+def genre_facets(model, genres):
+    version = table_version_query(model).scalar()
+    key = facet_key(model, genres)
+    counts = facet_cache().get(key, version)
+    if counts is None:
+        counts = [GenreCount(*row) for row in facets_query(model, genres)]
+        facet_cache().set(key, version, counts)
+    return counts
+
+
+def facets_data(genres, counts):
+    return {
+        "genres": genres,
+        "data": [{"genre": c.genre, "count": c.count} for c in counts],
+    }
+
+
+def init_genre_facets(app):
+    app.extensions["genre_facets"] = FacetCache(
+        maxsize=app.config.get("GENRE_FACET_CACHE_SIZE", 256)
+    )
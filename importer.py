@@ -0,0 +1,207 @@
+# Streaming import of venues, artists and shows from CSV or NDJSON.
+# Rows are read one at a time and validated with the forms of forms.py (field
+# names are the form's, genres are comma separated in CSV, booleans accept
+# y/yes/true/1). Valid rows are inserted IMPORT_BATCH_SIZE at a time, one
+# transaction per batch. When a batch is refused by the database (an unknown
+# venue id, a duplicate phone...) its rows are retried one by one, so that only
+# the offending rows are rejected. Shows booking a venue or an artist already
+# taken at that time, by the schedule or an earlier row, are rejected as well
+# (see conflicts.py), with one query per batch. Memory use depends on the batch
+# size, not on the size of the file.
+#
+#   $ FLASK_APP=app.py flask import-data shows feed.ndjson
+#   $ curl -F file=@feed.csv http://localhost:5000/import/shows
+import csv
+import json
+
+from flask import current_app
+from sqlalchemy.exc import DBAPIError
+from werkzeug.datastructures import MultiDict
+
+from conflicts import Slot, find_conflicts, describe
+from models import db, Venue, Artist, Show
+
+
+# Kind -> model and name of its form in forms.py, which is only imported (with
+# WTForms) by the first import.
+IMPORT_KINDS = {
+    "venues": (Venue, "VenueForm"),
+    "artists": (Artist, "ArtistForm"),
+    "shows": (Show, "ShowForm"),
+}
+FORMATS = ("csv", "ndjson")
+BOOLEAN_FIELDS = {"seeking_talent", "seeking_venue"}
+TRUE_VALUES = {"1", "t", "true", "y", "yes", "on"}
+
+
+class ImportReport:
+    def __init__(self, max_errors=100):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def reject(self, line, errors):
+        # Only the first `max_errors` rejections are kept, the others counted.
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def guess_format(filename, mimetype=None):
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension == "csv":
+            return "csv"
+        if extension in ("ndjson", "jsonl"):
+            return "ndjson"
+    if mimetype == "text/csv":
+        return "csv"
+    if mimetype in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    # Yields None for the lines which are not a JSON object.
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def _formdata(row):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        if key in BOOLEAN_FIELDS:
+            values = ["y"] if value is True or str(value).lower() in TRUE_VALUES else []
+        elif isinstance(value, list):
+            values = [str(v) for v in value]
+        elif key == "genres":
+            values = [v.strip() for v in str(value).split(",") if v.strip()]
+        else:
+            values = [str(value)]
+        formdata.setlist(key, values)
+    return formdata
+
+
+def validate_row(form_class, columns, row):
+    # Returns (values, errors): column values of a valid row, or form errors.
+    if row is None:
+        return None, {"row": ["Not a JSON object."]}
+    form = form_class(formdata=_formdata(row), meta={"csrf": False})
+    if not form.validate():
+        return None, form.errors
+    values = {
+        name: None if value == "" else value
+        for name, value in form.data.items()
+        if name in columns
+    }
+    return values, None
+
+
+def _database_error(error):
+    return str(getattr(error, "orig", error)).strip().splitlines()[0]
+
+
+def reject_show_conflicts(batch, report):
+    # Returns the rows of `batch` which do not double-book a venue or an artist.
+    slots = [Slot._make(values[field] for field in Slot._fields) for _, values in batch]
+    rejected = {}
+    for conflict in find_conflicts(slots):
+        rejected.setdefault(conflict.position, []).append(describe(conflict))
+    for position, errors in rejected.items():
+        report.reject(batch[position][0], {"start_time": errors})
+    return [row for position, row in enumerate(batch) if position not in rejected]
+
+
+# Kind -> check of a batch before it is inserted.
+BATCH_CHECKS = {"shows": reject_show_conflicts}
+
+
+def insert_batch(table, batch, report):
+    # `batch` is a list of (line, values). Rows are inserted with a single
+    # multi-row INSERT, or one by one when that fails.
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values([values for _, values in batch]))
+        report.inserted += len(batch)
+    except DBAPIError:
+        for line, values in batch:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert().values(values))
+                report.inserted += 1
+            except DBAPIError as error:
+                report.reject(line, {"row": [_database_error(error)]})
+    db.session.commit()
+
+
+def import_rows(kind, rows, batch_size=None, max_errors=None):
+    # `rows` yields (line, row dict or None); returns an ImportReport.
+    config = current_app.config
+    if batch_size is None:
+        batch_size = config.get("IMPORT_BATCH_SIZE", 1000)
+    if max_errors is None:
+        max_errors = config.get("IMPORT_MAX_ERRORS", 100)
+    import forms
+
+    model, form_name = IMPORT_KINDS[kind]
+    form_class = getattr(forms, form_name)
+    table = model.__table__
+    columns = set(table.c.keys())
+    check = BATCH_CHECKS.get(kind)
+    report = ImportReport(max_errors)
+    batch = []
+
+    def flush(batch):
+        if check is not None:
+            batch = check(batch, report)
+        if batch:
+            insert_batch(table, batch, report)
+
+    line = 0
+    try:
+        for line, row in rows:
+            values, errors = validate_row(form_class, columns, row)
+            if errors:
+                report.reject(line, errors)
+                continue
+            batch.append((line, values))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as error:
+        # The rest of the file cannot be read; what was read is still imported.
+        report.reject(line + 1, {"file": [str(error)]})
+    if batch:
+        flush(batch)
+    return report
+
+
+def import_stream(kind, stream, fmt, **kwargs):
+    # `stream` is a text stream; opened with newline="" for CSV.
+    return import_rows(kind, READERS[fmt](stream), **kwargs)
@@ -0,0 +1,165 @@
+# Per-request SQL instrumentation.
+# Every statement run while a request is handled is timed through engine events.
+# The response carries the totals in a Server-Timing header, e.g.
+#
+#   Server-Timing: db;dur=12.4;desc="7 queries", app;dur=30.1
+#
+# and a warning is logged when the request goes over SQL_QUERY_BUDGET queries, or
+# runs the same statement (up to its parameters) SQL_REPEATED_STATEMENT_THRESHOLD
+# times or more, the signature of an N+1 query. The stats of the last requests
+# of the process are served at /_debug/sql in debug mode or when
+# SQL_DEBUG_ENDPOINT is set.
+# Statements run while a streamed response is sent are not counted.
+import heapq
+import re
+import time
+from collections import Counter, deque
+
+from flask import abort, current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_PARAMETERS = re.compile(r"%\(\w+\)s|\?|\b\d+\b")
+_PARAMETER_LISTS = re.compile(r"\?(\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    # The statement without its parameters, IN lists collapsed to one item.
+    statement = _PARAMETERS.sub("?", statement)
+    statement = _PARAMETER_LISTS.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    def __init__(self, n_slowest=5):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slowest = []
+        self.n_slowest = n_slowest
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+        # Min-heap of the slowest statements; the count breaks ties.
+        entry = (duration, self.count, statement)
+        if len(self.slowest) < self.n_slowest:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def repeated(self, threshold):
+        return [(s, n) for s, n in self.fingerprints.most_common() if n >= threshold]
+
+    def as_dict(self):
+        return {
+            "queries": self.count,
+            "duration_ms": round(self.duration * 1000, 3),
+            "slowest": [
+                {"duration_ms": round(duration * 1000, 3), "statement": statement}
+                for duration, _, statement in sorted(self.slowest, reverse=True)
+            ],
+            "repeated": [
+                {"count": n, "statement": s}
+                for s, n in self.fingerprints.most_common()
+                if n > 1
+            ],
+        }
+
+
+def _current_stats():
+    if has_app_context():
+        return g.get("sql_stats")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    stats = _current_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+def _handle_error(exception_context):
+    # The statement failed: drop its start time.
+    started = exception_context.connection.info.get("query_started_at")
+    if started:
+        started.pop()
+
+
+def _start_request():
+    g.sql_stats = QueryStats(current_app.config.get("SQL_SLOWEST_STATEMENTS", 5))
+    g.request_started_at = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = g.get("sql_stats")
+    if stats is None:
+        return response
+    config = current_app.config
+    elapsed = time.perf_counter() - g.request_started_at
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={elapsed * 1000:.1f}",
+    )
+
+    budget = config.get("SQL_QUERY_BUDGET", 20)
+    if stats.count > budget:
+        current_app.logger.warning(
+            "%s %s ran %d queries, over the budget of %d",
+            request.method,
+            request.path,
+            stats.count,
+            budget,
+        )
+    threshold = config.get("SQL_REPEATED_STATEMENT_THRESHOLD", 5)
+    for statement, n in stats.repeated(threshold):
+        current_app.logger.warning(
+            "%s %s ran the same statement %d times (N+1?): %s",
+            request.method,
+            request.path,
+            n,
+            statement,
+        )
+
+    current_app.extensions["sql_instrumentation"].append(
+        dict(
+            stats.as_dict(),
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            status=response.status_code,
+            elapsed_ms=round(elapsed * 1000, 3),
+        )
+    )
+    return response
+
+
+def sql_debug():
+    if not (current_app.debug or current_app.config.get("SQL_DEBUG_ENDPOINT")):
+        abort(404)
+    # Most recent request first, this one excluded.
+    history = list(current_app.extensions["sql_instrumentation"])
+    return jsonify(requests=history[::-1])
+
+
+def init_sql_instrumentation(app):
+    if not app.config.get("SQL_INSTRUMENTATION_ENABLED", True):
+        return
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+    app.extensions["sql_instrumentation"] = deque(
+        maxlen=app.config.get("SQL_DEBUG_HISTORY", 50)
+    )
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/_debug/sql", "sql_debug", sql_debug)
@@ -0,0 +1,51 @@
+# Queries of the /venues, /artists and /shows listings, together with the keys
+# they are paginated on (see pagination.py). Each key tuple is backed by an index.
+# Venues and artists can be narrowed to those having all of `genres`.
+from counters import num_upcoming_shows
+from genres import filter_by_genres
+from models import db, Venue, Artist, Show
+
+
+VENUE_LISTING_KEYS = (Venue.city, Venue.state, Venue.name, Venue.id)
+ARTIST_LISTING_KEYS = (Artist.name, Artist.id)
+SHOW_LISTING_KEYS = (Show.start_time, Show.id)
+
+# Versions of the rows each tile of the /venues and /shows pages renders, which
+# the tiles are cached on (see fragments.py). Added by the pages only: they are
+# not part of the API's listings.
+VENUE_TILE_VERSIONS = (Venue.version,)
+SHOW_TILE_VERSIONS = (
+    Show.version,
+    Venue.version.label("venue_version"),
+    Artist.version.label("artist_version"),
+)
+
+
+def venues_listing_query(genres=()):
+    # num_upcoming_shows is read from the counter maintained by triggers on Show.
+    query = db.session.query(
+        Venue.id, Venue.name, Venue.city, Venue.state, num_upcoming_shows(Venue)
+    )
+    return filter_by_genres(query, Venue, genres)
+
+
+def artists_listing_query(genres=()):
+    return filter_by_genres(db.session.query(Artist.id, Artist.name), Artist, genres)
+
+
+def shows_listing_query():
+    # The join is along the foreign keys and bounded by the page size, so a
+    # single query is enough.
+    return (
+        db.session.query(
+            Show.id,
+            Show.start_time,
+            Venue.id.label("venue_id"),
+            Venue.name.label("venue_name"),
+            Artist.id.label("artist_id"),
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, Venue.id == Show.venue_id)
+        .join(Artist, Artist.id == Show.artist_id)
+    )
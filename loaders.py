@@ -0,0 +1,129 @@
+# Detail loaders for the venue and artist pages.
+# Each loader only touches the requested entity and its own shows, so a detail
+# page costs O(shows of the entity) instead of O(whole catalog).
+import datetime
+from operator import itemgetter
+
+from models import db, Venue, Artist, Show
+from viewmodels import (
+    fetch_all,
+    build_detail,
+    VenueDetail,
+    ArtistDetail,
+    VenueShow,
+    ArtistShow,
+)
+
+
+VENUE_DETAIL_COLUMNS = (
+    Venue.id,
+    Venue.name,
+    Venue.genres,
+    Venue.address,
+    Venue.city,
+    Venue.state,
+    Venue.phone,
+    Venue.website,
+    Venue.facebook_link,
+    Venue.seeking_talent,
+    Venue.seeking_description,
+    Venue.image_link,
+)
+
+ARTIST_DETAIL_COLUMNS = (
+    Artist.id,
+    Artist.name,
+    Artist.genres,
+    Artist.city,
+    Artist.state,
+    Artist.phone,
+    Artist.website,
+    Artist.facebook_link,
+    Artist.seeking_venue,
+    Artist.seeking_description,
+    Artist.image_link,
+)
+
+
+def _entity_query(model, columns, fk_column, entity_id, nowtime):
+    upcoming_count = (
+        db.session.query(db.func.count(Show.id))
+        .filter(fk_column == model.id, Show.start_time > nowtime)
+        .label("upcoming_shows_count")
+    )
+    past_count = (
+        db.session.query(db.func.count(Show.id))
+        .filter(fk_column == model.id, Show.start_time <= nowtime)
+        .label("past_shows_count")
+    )
+    return db.session.query(*columns, upcoming_count, past_count).filter(
+        model.id == entity_id
+    )
+
+
+def venue_detail_query(venue_id, nowtime):
+    return _entity_query(Venue, VENUE_DETAIL_COLUMNS, Show.venue_id, venue_id, nowtime)
+
+
+def artist_detail_query(artist_id, nowtime):
+    return _entity_query(
+        Artist, ARTIST_DETAIL_COLUMNS, Show.artist_id, artist_id, nowtime
+    )
+
+
+def venue_shows_query(venue_id, nowtime):
+    return (
+        db.session.query(
+            Artist.id.label("artist_id"),
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+            Show.start_time,
+            (Show.start_time > nowtime).label("is_upcoming"),
+        )
+        .join(Artist, Artist.id == Show.artist_id)
+        .filter(Show.venue_id == venue_id)
+        .order_by(Show.start_time, Show.id)
+    )
+
+
+def artist_shows_query(artist_id, nowtime):
+    return (
+        db.session.query(
+            Venue.id.label("venue_id"),
+            Venue.name.label("venue_name"),
+            Venue.image_link.label("venue_image_link"),
+            Show.start_time,
+            (Show.start_time > nowtime).label("is_upcoming"),
+        )
+        .join(Venue, Venue.id == Show.venue_id)
+        .filter(Show.artist_id == artist_id)
+        .order_by(Show.start_time, Show.id)
+    )
+
+
+def _load_detail(entity_id, detail_query, shows_query, view_model, show_model):
+    nowtime = datetime.datetime.utcnow()
+    entity = db.session.execute(detail_query(entity_id, nowtime).statement).first()
+    if entity is None:
+        return None
+
+    shows = {True: [], False: []}
+    show_fields = itemgetter(*show_model._fields)
+    for row in fetch_all(shows_query(entity_id, nowtime)):
+        shows[row.is_upcoming].append(show_model._make(show_fields(row)))
+    # Past shows are listed most recent first.
+    return build_detail(view_model, entity, shows[True], reversed(shows[False]))
+
+
+def load_venue_detail(venue_id):
+    # Returns the view model of show_venue.html, or None if the venue does not exist.
+    return _load_detail(
+        venue_id, venue_detail_query, venue_shows_query, VenueDetail, VenueShow
+    )
+
+
+def load_artist_detail(artist_id):
+    # Returns the view model of show_artist.html, or None if the artist does not exist.
+    return _load_detail(
+        artist_id, artist_detail_query, artist_shows_query, ArtistDetail, ArtistShow
+    )
@@ -0,0 +1,147 @@
+# Load test comparing the sync (WSGI) and async (ASGI, see asgi.py) serving
+# paths. Start both servers on the same database, e.g.
+#
+#   gunicorn --workers 2 --threads 8 --bind 127.0.0.1:8000 'app:create_app()'
+#   uvicorn --workers 2 --port 8001 asgi:app
+#
+# then hit them in turn with the same mix of read routes:
+#
+#   python loadtest.py http://127.0.0.1:8000 http://127.0.0.1:8001 \
+#       --concurrency 200 --duration 20
+#
+# Each of the --concurrency clients sends its requests one after the other, on
+# a new connection each time, for --duration seconds; --think-time makes them
+# pause between requests. The report gives the throughput, latency percentiles
+# and failures (errors and non-2xx/304 responses) of each server.
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from percentiles import percentiles
+
+
+DEFAULT_PATHS = (
+    "/api/v1/venues",
+    "/api/v1/artists",
+    "/api/v1/shows",
+    "/api/v1/venues/1",
+    "/api/v1/artists/1",
+    "/api/v1/venues/search?q=the",
+    "/api/v1/artists/search?q=band",
+)
+
+
+async def request(host, port, path, timeout):
+    # A bare HTTP/1.1 GET, so that the client's own overhead stays small and
+    # the same for both servers. Returns the status code.
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout
+    )
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def client(host, port, paths, deadline, think_time, timeout, results, rng):
+    while time.monotonic() < deadline:
+        started_at = time.perf_counter()
+        try:
+            status = await request(host, port, rng.choice(paths), timeout)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status = None
+        results.append((status, time.perf_counter() - started_at))
+        if think_time:
+            await asyncio.sleep(think_time)
+
+
+async def run(url, paths, concurrency, duration, think_time, timeout, seed):
+    parts = urlsplit(url)
+    results = []
+    deadline = time.monotonic() + duration
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *[
+            client(
+                parts.hostname,
+                parts.port or 80,
+                paths,
+                deadline,
+                think_time,
+                timeout,
+                results,
+                random.Random(seed + i),
+            )
+            for i in range(concurrency)
+        ]
+    )
+    return results, time.perf_counter() - started_at
+
+
+def summarize(url, results, elapsed):
+    ok = [
+        d
+        for status, d in results
+        if status is not None and (200 <= status < 300 or status == 304)
+    ]
+    failed = len(results) - len(ok)
+    p50, p95, p99 = percentiles(ok, [50, 95, 99])
+    return {
+        "url": url,
+        "requests": len(results),
+        "failed": failed,
+        "rps": len(ok) / elapsed,
+        "mean_ms": statistics.mean(ok) * 1000 if ok else float("nan"),
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the throughput and latency of servers."
+    )
+    parser.add_argument("urls", nargs="+", help="base URLs of the servers to compare")
+    parser.add_argument("--path", action="append", dest="paths", help="repeatable")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = args.paths or list(DEFAULT_PATHS)
+    print(
+        f"{'url':<32} {'requests':>9} {'failed':>7} {'req/s':>9} "
+        f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for url in args.urls:
+        results, elapsed = asyncio.run(
+            run(
+                url,
+                paths,
+                args.concurrency,
+                args.duration,
+                args.think_time,
+                args.timeout,
+                args.seed,
+            )
+        )
+        s = summarize(url, results, elapsed)
+        print(
+            f"{s['url']:<32} {s['requests']:>9} {s['failed']:>7} {s['rps']:>9.1f} "
+            f"{s['mean_ms']:>9.1f} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Prometheus metrics, served at /metrics:
+#
+#   fyyur_request_duration_seconds{endpoint,method,status}   histogram
+#   fyyur_requests_in_progress{endpoint}                      gauge
+#   fyyur_request_db_seconds{endpoint}                        histogram, SQL time
+#   fyyur_template_render_seconds{template}                   histogram
+#   fyyur_db_pool_wait_seconds                                histogram, checkout wait
+#   fyyur_db_pool_connections{state}                          gauge, checked_out/overflow/waiting
+#   fyyur_fragment_cache_lookups_total{result}                counter, hit or miss
+#
+# Requires prometheus_client; without it the app runs unchanged and /metrics is
+# not served. Under a multi-process server, set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by the workers before they start (and wipe it on
+# deploy): every worker then writes its samples there and /metrics aggregates
+# them. With gunicorn, also call `mark_process_dead(worker.pid)` from its
+# child_exit hook.
+import os
+import threading
+import time
+
+from flask import current_app, g, request
+from jinja2 import Template
+
+from dbpool import observe_checkout_wait, TimedQueuePool
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+def _multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+        "prometheus_multiproc_dir"
+    )
+
+
+class Metrics:
+    def __init__(self):
+        self.request_duration = prometheus_client.Histogram(
+            "fyyur_request_duration_seconds",
+            "Time spent handling a request, streamed bodies excluded.",
+            ["endpoint", "method", "status"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.requests_in_progress = prometheus_client.Gauge(
+            "fyyur_requests_in_progress",
+            "Requests being handled.",
+            ["endpoint"],
+            multiprocess_mode="livesum",
+        )
+        self.request_db = prometheus_client.Histogram(
+            "fyyur_request_db_seconds",
+            "Time spent in SQL statements per request.",
+            ["endpoint"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.template_render = prometheus_client.Histogram(
+            "fyyur_template_render_seconds",
+            "Time spent rendering a template.",
+            ["template"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.pool_wait = prometheus_client.Histogram(
+            "fyyur_db_pool_wait_seconds",
+            "Time spent waiting for a database connection from the pool.",
+            buckets=WAIT_BUCKETS,
+        )
+        self.pool_connections = prometheus_client.Gauge(
+            "fyyur_db_pool_connections",
+            "Connections checked out of the pool, beyond its size, and threads waiting for one.",
+            ["state"],
+            multiprocess_mode="livesum",
+        )
+        self.fragment_cache = prometheus_client.Counter(
+            "fyyur_fragment_cache_lookups_total",
+            "Lookups in the template fragment cache.",
+            ["result"],
+        )
+        self._fragment_cache_seen = (0, 0)
+        self._lock = threading.Lock()
+
+    def sync_fragment_cache(self, cache):
+        # The cache keeps plain hit/miss totals; count what happened since the
+        # last call.
+        with self._lock:
+            hits, misses = cache.hits, cache.misses
+            seen_hits, seen_misses = self._fragment_cache_seen
+            self._fragment_cache_seen = (hits, misses)
+        if hits > seen_hits:
+            self.fragment_cache.labels("hit").inc(hits - seen_hits)
+        if misses > seen_misses:
+            self.fragment_cache.labels("miss").inc(misses - seen_misses)
+
+
+def _endpoint():
+    # Unmatched URLs are grouped, so that scanners cannot blow up the labels.
+    return request.endpoint or "unmatched"
+
+
+def _start_request():
+    if request.endpoint == "metrics":
+        return
+    g.metrics_started_at = time.perf_counter()
+    g.metrics_endpoint = _endpoint()
+    current_app.extensions["metrics"].requests_in_progress.labels(
+        g.metrics_endpoint
+    ).inc()
+
+
+def _finish_request(response):
+    started_at = g.get("metrics_started_at")
+    if started_at is None:
+        return response
+    metrics = current_app.extensions["metrics"]
+    endpoint = g.metrics_endpoint
+    metrics.request_duration.labels(
+        endpoint, request.method, str(response.status_code)
+    ).observe(time.perf_counter() - started_at)
+    sql_stats = g.get("sql_stats")
+    if sql_stats is not None:
+        metrics.request_db.labels(endpoint).observe(sql_stats.duration)
+    cache = current_app.jinja_env.fragment_cache
+    if cache is not None:
+        metrics.sync_fragment_cache(cache)
+    pool = current_app.extensions["sqlalchemy"].db.engine.pool
+    if isinstance(pool, TimedQueuePool):
+        stats = pool.stats()
+        for state in ("checked_out", "overflow", "waiting"):
+            metrics.pool_connections.labels(state).set(stats[state])
+    return response
+
+
+def _teardown_request(exception):
+    endpoint = g.pop("metrics_endpoint", None)
+    if endpoint is not None:
+        current_app.extensions["metrics"].requests_in_progress.labels(endpoint).dec()
+
+
+class TimedTemplate(Template):
+    # Times top-level renders; included templates count towards their parent.
+    def render(self, *args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            self.environment.metrics.template_render.labels(
+                self.name or "<string>"
+            ).observe(time.perf_counter() - started_at)
+
+
+def metrics_view():
+    if _multiprocess_dir():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return current_app.response_class(
+        prometheus_client.generate_latest(registry),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+def mark_process_dead(pid):
+    if prometheus_client is not None and _multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+_metrics = None
+
+
+def init_metrics(app):
+    # Metrics are process-wide, so they are created once for all apps.
+    global _metrics
+    if prometheus_client is None or not app.config.get("METRICS_ENABLED", True):
+        return None
+    if _metrics is None:
+        _metrics = Metrics()
+        observe_checkout_wait(_metrics.pool_wait.observe)
+    app.extensions["metrics"] = _metrics
+    app.jinja_env.metrics = _metrics
+    app.jinja_env.template_class = TimedTemplate
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    return _metrics
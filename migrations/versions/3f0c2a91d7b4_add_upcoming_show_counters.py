@@ -0,0 +1,169 @@
+"""add upcoming show counters
+
+Revision ID: 3f0c2a91d7b4
+Revises: e5a642bdd913
+Create Date: 2026-10-18 11:02:48.913305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f0c2a91d7b4"
+down_revision = "e5a642bdd913"
+branch_labels = None
+depends_on = None
+
+
+# Show.is_upcoming is set from start_time when a row is written, and flipped
+# to false by the periodic rollover (`flask rollover-shows`).
+SET_IS_UPCOMING = """
+CREATE FUNCTION show_set_is_upcoming() RETURNS trigger AS $$
+BEGIN
+    NEW.is_upcoming := NEW.start_time > timezone('utc', now());
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Venue/Artist.upcoming_shows_count follow the Show rows with is_upcoming set.
+# Statement level triggers with transition tables apply one grouped UPDATE per
+# statement, so bulk inserts and deletes do not update the counters row by row.
+APPLY_COUNTERS = """
+CREATE FUNCTION show_apply_upcoming_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE "Venue" AS v SET upcoming_shows_count = v.upcoming_shows_count - d.n
+        FROM (
+            SELECT venue_id, count(*) AS n FROM old_shows
+            WHERE is_upcoming GROUP BY venue_id
+        ) AS d
+        WHERE v.id = d.venue_id;
+        UPDATE "Artist" AS a SET upcoming_shows_count = a.upcoming_shows_count - d.n
+        FROM (
+            SELECT artist_id, count(*) AS n FROM old_shows
+            WHERE is_upcoming GROUP BY artist_id
+        ) AS d
+        WHERE a.id = d.artist_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE "Venue" AS v SET upcoming_shows_count = v.upcoming_shows_count + d.n
+        FROM (
+            SELECT venue_id, count(*) AS n FROM new_shows
+            WHERE is_upcoming GROUP BY venue_id
+        ) AS d
+        WHERE v.id = d.venue_id;
+        UPDATE "Artist" AS a SET upcoming_shows_count = a.upcoming_shows_count + d.n
+        FROM (
+            SELECT artist_id, count(*) AS n FROM new_shows
+            WHERE is_upcoming GROUP BY artist_id
+        ) AS d
+        WHERE a.id = d.artist_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER show_set_is_upcoming
+    BEFORE INSERT OR UPDATE OF start_time ON "Show"
+    FOR EACH ROW EXECUTE PROCEDURE show_set_is_upcoming()
+    """,
+    """
+    CREATE TRIGGER show_upcoming_counters_insert
+    AFTER INSERT ON "Show" REFERENCING NEW TABLE AS new_shows
+    FOR EACH STATEMENT EXECUTE PROCEDURE show_apply_upcoming_counters()
+    """,
+    """
+    CREATE TRIGGER show_upcoming_counters_update
+    AFTER UPDATE ON "Show" REFERENCING OLD TABLE AS old_shows NEW TABLE AS new_shows
+    FOR EACH STATEMENT EXECUTE PROCEDURE show_apply_upcoming_counters()
+    """,
+    """
+    CREATE TRIGGER show_upcoming_counters_delete
+    AFTER DELETE ON "Show" REFERENCING OLD TABLE AS old_shows
+    FOR EACH STATEMENT EXECUTE PROCEDURE show_apply_upcoming_counters()
+    """,
+]
+
+
+def upgrade():
+    op.add_column(
+        "Show",
+        sa.Column(
+            "is_upcoming", sa.Boolean(), server_default=sa.text("false"), nullable=False
+        ),
+    )
+    op.add_column(
+        "Venue",
+        sa.Column(
+            "upcoming_shows_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "Artist",
+        sa.Column(
+            "upcoming_shows_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_Show_upcoming_start_time",
+        "Show",
+        ["start_time"],
+        postgresql_where=sa.text("is_upcoming"),
+    )
+
+    # Backfill from the existing shows before the triggers take over.
+    op.execute(
+        """
+        UPDATE "Show" SET is_upcoming = true
+        WHERE start_time > timezone('utc', now())
+        """
+    )
+    op.execute(
+        """
+        UPDATE "Venue" AS v SET upcoming_shows_count = d.n
+        FROM (
+            SELECT venue_id, count(*) AS n FROM "Show"
+            WHERE is_upcoming GROUP BY venue_id
+        ) AS d
+        WHERE v.id = d.venue_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE "Artist" AS a SET upcoming_shows_count = d.n
+        FROM (
+            SELECT artist_id, count(*) AS n FROM "Show"
+            WHERE is_upcoming GROUP BY artist_id
+        ) AS d
+        WHERE a.id = d.artist_id
+        """
+    )
+
+    op.execute(SET_IS_UPCOMING)
+    op.execute(APPLY_COUNTERS)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER show_upcoming_counters_delete ON "Show"')
+    op.execute('DROP TRIGGER show_upcoming_counters_update ON "Show"')
+    op.execute('DROP TRIGGER show_upcoming_counters_insert ON "Show"')
+    op.execute('DROP TRIGGER show_set_is_upcoming ON "Show"')
+    op.execute("DROP FUNCTION show_apply_upcoming_counters()")
+    op.execute("DROP FUNCTION show_set_is_upcoming()")
+    op.drop_index("ix_Show_upcoming_start_time", table_name="Show")
+    op.drop_column("Artist", "upcoming_shows_count")
+    op.drop_column("Venue", "upcoming_shows_count")
+    op.drop_column("Show", "is_upcoming")
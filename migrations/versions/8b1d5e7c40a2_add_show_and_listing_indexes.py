@@ -0,0 +1,36 @@
+"""add show and listing indexes
+
+Revision ID: 8b1d5e7c40a2
+Revises: 3f0c2a91d7b4
+Create Date: 2026-10-18 11:47:05.220816
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8b1d5e7c40a2"
+down_revision = "3f0c2a91d7b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Shows of one venue/artist, split and ordered by start_time (detail pages).
+    op.create_index("ix_Show_venue_id_start_time", "Show", ["venue_id", "start_time"])
+    op.create_index("ix_Show_artist_id_start_time", "Show", ["artist_id", "start_time"])
+    # Range scans on start_time, and the (start_time, id) keyset of /shows.
+    op.create_index("ix_Show_start_time_id", "Show", ["start_time", "id"])
+    # Keysets of /venues and /artists.
+    op.create_index(
+        "ix_Venue_city_state_name_id", "Venue", ["city", "state", "name", "id"]
+    )
+    op.create_index("ix_Artist_name_id", "Artist", ["name", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_Artist_name_id", table_name="Artist")
+    op.drop_index("ix_Venue_city_state_name_id", table_name="Venue")
+    op.drop_index("ix_Show_start_time_id", table_name="Show")
+    op.drop_index("ix_Show_artist_id_start_time", table_name="Show")
+    op.drop_index("ix_Show_venue_id_start_time", table_name="Show")
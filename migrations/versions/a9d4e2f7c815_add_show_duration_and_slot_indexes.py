@@ -0,0 +1,50 @@
+"""add show duration and slot indexes
+
+Revision ID: a9d4e2f7c815
+Revises: f3b8d2c61e07
+Create Date: 2026-10-18 16:20:07.338415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a9d4e2f7c815"
+down_revision = "f3b8d2c61e07"
+branch_labels = None
+depends_on = None
+
+
+# Same expression as models.show_slot, for the planner to match the indexes.
+SLOT = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+
+def upgrade():
+    op.add_column(
+        "Show",
+        sa.Column(
+            "duration_minutes",
+            sa.Integer(),
+            server_default=sa.text("120"),
+            nullable=False,
+        ),
+    )
+    op.create_check_constraint(
+        "ck_Show_duration_minutes_positive", "Show", "duration_minutes > 0"
+    )
+    # GiST indexes over (id, slot) serve "shows of this venue/artist overlapping
+    # that slot" (see conflicts.py); btree_gist provides the GiST equality on
+    # integers. Not an exclusion constraint: existing schedules may overlap.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    for column in ("venue_id", "artist_id"):
+        op.execute(
+            f'CREATE INDEX "ix_Show_{column}_slot" ON "Show" USING gist ({column}, {SLOT})'
+        )
+
+
+def downgrade():
+    op.drop_index("ix_Show_artist_id_slot", table_name="Show")
+    op.drop_index("ix_Show_venue_id_slot", table_name="Show")
+    op.drop_constraint("ck_Show_duration_minutes_positive", "Show", type_="check")
+    op.drop_column("Show", "duration_minutes")
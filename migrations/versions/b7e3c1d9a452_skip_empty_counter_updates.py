@@ -0,0 +1,138 @@
+"""skip empty counter updates
+
+Revision ID: b7e3c1d9a452
+Revises: e2a7b9c4d610
+Create Date: 2026-10-19 10:04:21.630518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e3c1d9a452"
+down_revision = "e2a7b9c4d610"
+branch_labels = None
+depends_on = None
+
+
+# Only run the counter UPDATEs when a counter moves. Each UPDATE statement on
+# Venue or Artist fires their statement triggers, which bump the tables'
+# versions, even when it matches no row: inserting past shows, or rolling
+# upcoming shows over, must not touch Venue and Artist for nothing.
+# An UPDATE of Show applies the net change of the rows whose upcoming status,
+# venue or artist changed, so rescheduling an upcoming show leaves the counters
+# alone.
+APPLY_COUNTERS = """
+CREATE OR REPLACE FUNCTION show_apply_upcoming_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF EXISTS (SELECT 1 FROM new_shows WHERE is_upcoming) THEN
+            UPDATE "Venue" AS v
+            SET upcoming_shows_count = v.upcoming_shows_count + d.n
+            FROM (
+                SELECT venue_id, count(*) AS n FROM new_shows
+                WHERE is_upcoming GROUP BY venue_id
+            ) AS d
+            WHERE v.id = d.venue_id;
+            UPDATE "Artist" AS a
+            SET upcoming_shows_count = a.upcoming_shows_count + d.n
+            FROM (
+                SELECT artist_id, count(*) AS n FROM new_shows
+                WHERE is_upcoming GROUP BY artist_id
+            ) AS d
+            WHERE a.id = d.artist_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF EXISTS (SELECT 1 FROM old_shows WHERE is_upcoming) THEN
+            UPDATE "Venue" AS v
+            SET upcoming_shows_count = v.upcoming_shows_count - d.n
+            FROM (
+                SELECT venue_id, count(*) AS n FROM old_shows
+                WHERE is_upcoming GROUP BY venue_id
+            ) AS d
+            WHERE v.id = d.venue_id;
+            UPDATE "Artist" AS a
+            SET upcoming_shows_count = a.upcoming_shows_count - d.n
+            FROM (
+                SELECT artist_id, count(*) AS n FROM old_shows
+                WHERE is_upcoming GROUP BY artist_id
+            ) AS d
+            WHERE a.id = d.artist_id;
+        END IF;
+    ELSIF EXISTS (
+        SELECT 1 FROM old_shows AS o JOIN new_shows AS n USING (id)
+        WHERE (o.is_upcoming OR n.is_upcoming)
+        AND (o.is_upcoming, o.venue_id, o.artist_id)
+            IS DISTINCT FROM (n.is_upcoming, n.venue_id, n.artist_id)
+    ) THEN
+        UPDATE "Venue" AS v
+        SET upcoming_shows_count = v.upcoming_shows_count + d.n
+        FROM (
+            SELECT venue_id, sum(n) AS n FROM (
+                SELECT venue_id, 1 AS n FROM new_shows WHERE is_upcoming
+                UNION ALL
+                SELECT venue_id, -1 FROM old_shows WHERE is_upcoming
+            ) AS c
+            GROUP BY venue_id HAVING sum(n) <> 0
+        ) AS d
+        WHERE v.id = d.venue_id;
+        UPDATE "Artist" AS a
+        SET upcoming_shows_count = a.upcoming_shows_count + d.n
+        FROM (
+            SELECT artist_id, sum(n) AS n FROM (
+                SELECT artist_id, 1 AS n FROM new_shows WHERE is_upcoming
+                UNION ALL
+                SELECT artist_id, -1 FROM old_shows WHERE is_upcoming
+            ) AS c
+            GROUP BY artist_id HAVING sum(n) <> 0
+        ) AS d
+        WHERE a.id = d.artist_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_APPLY_COUNTERS = """
+CREATE OR REPLACE FUNCTION show_apply_upcoming_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE "Venue" AS v SET upcoming_shows_count = v.upcoming_shows_count - d.n
+        FROM (
+            SELECT venue_id, count(*) AS n FROM old_shows
+            WHERE is_upcoming GROUP BY venue_id
+        ) AS d
+        WHERE v.id = d.venue_id;
+        UPDATE "Artist" AS a SET upcoming_shows_count = a.upcoming_shows_count - d.n
+        FROM (
+            SELECT artist_id, count(*) AS n FROM old_shows
+            WHERE is_upcoming GROUP BY artist_id
+        ) AS d
+        WHERE a.id = d.artist_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE "Venue" AS v SET upcoming_shows_count = v.upcoming_shows_count + d.n
+        FROM (
+            SELECT venue_id, count(*) AS n FROM new_shows
+            WHERE is_upcoming GROUP BY venue_id
+        ) AS d
+        WHERE v.id = d.venue_id;
+        UPDATE "Artist" AS a SET upcoming_shows_count = a.upcoming_shows_count + d.n
+        FROM (
+            SELECT artist_id, count(*) AS n FROM new_shows
+            WHERE is_upcoming GROUP BY artist_id
+        ) AS d
+        WHERE a.id = d.artist_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.execute(APPLY_COUNTERS)
+
+
+def downgrade():
+    op.execute(PREVIOUS_APPLY_COUNTERS)
@@ -0,0 +1,68 @@
+"""add table versions
+
+Revision ID: c6e4f9a1b352
+Revises: 8b1d5e7c40a2
+Create Date: 2026-10-18 12:31:14.051772
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c6e4f9a1b352"
+down_revision = "8b1d5e7c40a2"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["Venue", "Artist", "Show"]
+
+# Bumped once per write statement on a table; read routes derive their ETag
+# and Last-Modified from these rows (see conditional.py).
+BUMP_TABLE_VERSION = """
+CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "TableVersion" (name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, timezone('utc', now()))
+    ON CONFLICT (name) DO UPDATE
+    SET version = "TableVersion".version + 1, updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.create_table(
+        "TableVersion",
+        sa.Column("name", sa.String(length=63), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(
+        sa.table("TableVersion", sa.column("name")),
+        [{"name": table} for table in TABLES],
+    )
+    op.execute(BUMP_TABLE_VERSION)
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table.lower()}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}"
+            FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()
+            """
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER {table.lower()}_bump_version ON "{table}"')
+    op.execute("DROP FUNCTION bump_table_version()")
+    op.drop_table("TableVersion")
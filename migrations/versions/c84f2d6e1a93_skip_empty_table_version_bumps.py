@@ -0,0 +1,95 @@
+"""skip empty table version bumps
+
+Revision ID: c84f2d6e1a93
+Revises: b7e3c1d9a452
+Create Date: 2026-10-19 10:41:55.207391
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c84f2d6e1a93"
+down_revision = "b7e3c1d9a452"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["Venue", "Artist", "Show"]
+
+# Statement triggers fire even when the statement touches no row: an UPDATE or
+# DELETE matching nothing must not invalidate every ETag and cached page of the
+# table. Transition tables tell which rows were written; they can only be
+# declared on triggers for a single event, hence one trigger per operation.
+BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NOT EXISTS (SELECT 1 FROM new_rows) THEN
+            RETURN NULL;
+        END IF;
+    ELSIF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF NOT EXISTS (SELECT 1 FROM old_rows) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO "TableVersion" (name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, timezone('utc', clock_timestamp()))
+    ON CONFLICT (name) DO UPDATE
+    SET version = "TableVersion".version + 1,
+        updated_at = GREATEST("TableVersion".updated_at, EXCLUDED.updated_at);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "TableVersion" (name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, timezone('utc', clock_timestamp()))
+    ON CONFLICT (name) DO UPDATE
+    SET version = "TableVersion".version + 1,
+        updated_at = GREATEST("TableVersion".updated_at, EXCLUDED.updated_at);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Event -> transition tables of its trigger.
+EVENTS = {
+    "insert": "REFERENCING NEW TABLE AS new_rows",
+    "update": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "REFERENCING OLD TABLE AS old_rows",
+    "truncate": "",
+}
+
+
+def upgrade():
+    op.execute(BUMP_TABLE_VERSION)
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER {table.lower()}_bump_version ON "{table}"')
+        for event, referencing in EVENTS.items():
+            op.execute(
+                f"""
+                CREATE TRIGGER {table.lower()}_bump_version_{event}
+                AFTER {event.upper()} ON "{table}" {referencing}
+                FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()
+                """
+            )
+
+
+def downgrade():
+    for table in TABLES:
+        for event in EVENTS:
+            op.execute(
+                f'DROP TRIGGER {table.lower()}_bump_version_{event} ON "{table}"'
+            )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table.lower()}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}"
+            FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()
+            """
+        )
+    op.execute(PREVIOUS_BUMP_TABLE_VERSION)
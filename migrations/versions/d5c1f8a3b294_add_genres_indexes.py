@@ -0,0 +1,26 @@
+"""add genres indexes
+
+Revision ID: d5c1f8a3b294
+Revises: a9d4e2f7c815
+Create Date: 2026-10-18 17:45:52.904113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d5c1f8a3b294"
+down_revision = "a9d4e2f7c815"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GIN indexes serve the genre filters, `genres @> ARRAY[...]`.
+    op.create_index("ix_Venue_genres", "Venue", ["genres"], postgresql_using="gin")
+    op.create_index("ix_Artist_genres", "Artist", ["genres"], postgresql_using="gin")
+
+
+def downgrade():
+    op.drop_index("ix_Artist_genres", table_name="Artist")
+    op.drop_index("ix_Venue_genres", table_name="Venue")
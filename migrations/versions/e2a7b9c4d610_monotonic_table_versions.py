@@ -0,0 +1,53 @@
+"""monotonic table versions
+
+Revision ID: e2a7b9c4d610
+Revises: d5c1f8a3b294
+Create Date: 2026-10-19 09:12:37.418265
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e2a7b9c4d610"
+down_revision = "d5c1f8a3b294"
+branch_labels = None
+depends_on = None
+
+
+# now() is the start of the transaction: a long transaction committing last
+# would move updated_at, hence Last-Modified, backwards and let clients sending
+# only If-Modified-Since revalidate a stale page. Take the time of the write,
+# and never go back.
+BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "TableVersion" (name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, timezone('utc', clock_timestamp()))
+    ON CONFLICT (name) DO UPDATE
+    SET version = "TableVersion".version + 1,
+        updated_at = GREATEST("TableVersion".updated_at, EXCLUDED.updated_at);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "TableVersion" (name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, timezone('utc', now()))
+    ON CONFLICT (name) DO UPDATE
+    SET version = "TableVersion".version + 1, updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.execute(BUMP_TABLE_VERSION)
+
+
+def downgrade():
+    op.execute(PREVIOUS_BUMP_TABLE_VERSION)
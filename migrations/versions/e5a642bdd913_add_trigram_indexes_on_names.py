@@ -0,0 +1,41 @@
+"""add trigram indexes on names
+
+Revision ID: e5a642bdd913
+Revises: 2827d894735e
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a642bdd913"
+down_revision = "2827d894735e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm GIN indexes serve `name ILIKE '%term%'` and similarity() ordering
+    # without a sequential scan of the table.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_Venue_name_trgm",
+        "Venue",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_Artist_name_trgm",
+        "Artist",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_Artist_name_trgm", table_name="Artist")
+    op.drop_index("ix_Venue_name_trgm", table_name="Venue")
+    # The pg_trgm extension is left installed as other objects may depend on it.
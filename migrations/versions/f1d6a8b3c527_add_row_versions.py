@@ -0,0 +1,59 @@
+"""add row versions
+
+Revision ID: f1d6a8b3c527
+Revises: c84f2d6e1a93
+Create Date: 2026-10-19 11:26:08.951764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f1d6a8b3c527"
+down_revision = "c84f2d6e1a93"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["Venue", "Artist", "Show"]
+
+# Every write changing a row bumps its version, whatever issued it: forms,
+# imports, the counter triggers or the rollover. Cached fragments rendering
+# the row are keyed on it (see fragments.py).
+BUMP_ROW_VERSION = """
+CREATE FUNCTION bump_row_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "version", sa.BigInteger(), server_default=sa.text("1"), nullable=False
+            ),
+        )
+    op.execute(BUMP_ROW_VERSION)
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table.lower()}_bump_row_version
+            BEFORE UPDATE ON "{table}"
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+            EXECUTE PROCEDURE bump_row_version()
+            """
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER {table.lower()}_bump_row_version ON "{table}"')
+    op.execute("DROP FUNCTION bump_row_version()")
+    for table in TABLES:
+        op.drop_column(table, "version")
@@ -0,0 +1,35 @@
+"""cascade show deletes
+
+Revision ID: f3b8d2c61e07
+Revises: c6e4f9a1b352
+Create Date: 2026-10-18 15:02:41.613920
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f3b8d2c61e07"
+down_revision = "c6e4f9a1b352"
+branch_labels = None
+depends_on = None
+
+
+# Show column -> referenced table.
+FOREIGN_KEYS = {"venue_id": "Venue", "artist_id": "Artist"}
+
+
+def _replace_foreign_keys(ondelete):
+    for column, table in FOREIGN_KEYS.items():
+        name = f"Show_{column}_fkey"
+        op.drop_constraint(name, "Show", type_="foreignkey")
+        op.create_foreign_key(name, "Show", table, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade():
+    # Deleting a venue or an artist deletes its shows in the same statement.
+    _replace_foreign_keys("CASCADE")
+
+
+def downgrade():
+    _replace_foreign_keys(None)
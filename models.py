@@ -1,18 +1,44 @@
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from dbpool import init_pool
+from routing import RoutingSQLAlchemy, init_replicas
 
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 
-def init_db(app):
+def init_db(app, migrations=True):
+    # Flask-Migrate (and Alembic) are only imported when `migrations` is set.
+    init_pool(app)
+    init_replicas(app, db)
     db.init_app(app)
-    Migrate(app, db)
+    if migrations:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
     return db
 
 
+def trigram_index(table_name, column_name):
+    # GIN index with pg_trgm operators, used by substring search (see search.py).
+    return db.Index(
+        f"ix_{table_name}_{column_name}_trgm",
+        column_name,
+        postgresql_using="gin",
+        postgresql_ops={column_name: "gin_trgm_ops"},
+    )
+
+
+def genres_index(table_name):
+    # GIN index serving `genres @> ARRAY[...]`, used by genre filters (see genres.py).
+    return db.Index(f"ix_{table_name}_genres", "genres", postgresql_using="gin")
+
+
 class Venue(db.Model):
     __tablename__ = "Venue"
+    __table_args__ = (
+        trigram_index("Venue", "name"),
+        db.Index("ix_Venue_city_state_name_id", "city", "state", "name", "id"),
+        genres_index("Venue"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -30,11 +56,24 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, nullable=True)
     seeking_description = db.Column(db.String(120), nullable=True)
 
+    # Maintained by triggers on Show, see counters.py.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, server_default=db.text("0")
+    )
+    # Bumped by a trigger whenever the row changes; cached fragments rendering
+    # the row are keyed on it, see fragments.py.
+    version = db.Column(db.BigInteger, nullable=False, server_default=db.text("1"))
+
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
 
 
 class Artist(db.Model):
     __tablename__ = "Artist"
+    __table_args__ = (
+        trigram_index("Artist", "name"),
+        db.Index("ix_Artist_name_id", "name", "id"),
+        genres_index("Artist"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -49,22 +88,101 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean, nullable=True)
     seeking_description = db.Column(db.String(120), nullable=True)
 
+    # Maintained by triggers on Show, see counters.py.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, server_default=db.text("0")
+    )
+    # Bumped by a trigger whenever the row changes; cached fragments rendering
+    # the row are keyed on it, see fragments.py.
+    version = db.Column(db.BigInteger, nullable=False, server_default=db.text("1"))
+
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
 
 
+# Shows last this long unless told otherwise.
+DEFAULT_SHOW_DURATION_MINUTES = 120
+
+
+def show_slot(start_time, duration_minutes):
+    # The [start, end) range a show occupies its venue and artist, as indexed
+    # by the GiST indexes of Show (see conflicts.py).
+    return db.func.tsrange(
+        start_time,
+        start_time + duration_minutes * db.literal_column("interval '1 minute'"),
+    )
+
+
 class Show(db.Model):
     __tablename__ = "Show"
+    __table_args__ = (
+        db.CheckConstraint(
+            "duration_minutes > 0", name="ck_Show_duration_minutes_positive"
+        ),
+        db.Index("ix_Show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_Show_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_Show_start_time_id", "start_time", "id"),
+        db.Index(
+            "ix_Show_upcoming_start_time",
+            "start_time",
+            postgresql_where=db.text("is_upcoming"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     start_time = db.Column(db.TIMESTAMP(), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
+    duration_minutes = db.Column(
+        db.Integer,
+        nullable=False,
+        server_default=db.text(str(DEFAULT_SHOW_DURATION_MINUTES)),
+    )
+    # Shows are deleted with their venue or artist by the database, see deletion.py.
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey("Venue.id", ondelete="CASCADE"), nullable=False
+    )
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("Artist.id", ondelete="CASCADE"), nullable=False
+    )
+    # Set from start_time by a trigger on write, cleared by the periodic
+    # rollover once the show has started. See counters.py.
+    is_upcoming = db.Column(db.Boolean, nullable=False, server_default=db.text("false"))
+    # Bumped by a trigger whenever the row changes; cached fragments rendering
+    # the row are keyed on it, see fragments.py.
+    version = db.Column(db.BigInteger, nullable=False, server_default=db.text("1"))
 
     artist = db.relationship(
-        "Artist", backref=db.backref("shows", cascade="all,delete"), lazy=True
+        "Artist",
+        backref=db.backref("shows", cascade="all,delete", passive_deletes=True),
+        lazy=True,
     )
     venue = db.relationship(
-        "Venue", backref=db.backref("shows", cascade="all,delete"), lazy=True
+        "Venue",
+        backref=db.backref("shows", cascade="all,delete", passive_deletes=True),
+        lazy=True,
+    )
+
+
+# Double-booking lookups: a venue's or an artist's shows overlapping a slot.
+# Requires the btree_gist extension for the equality on the id.
+for _column in (Show.venue_id, Show.artist_id):
+    db.Index(
+        f"ix_Show_{_column.key}_slot",
+        _column,
+        show_slot(Show.start_time, Show.duration_minutes),
+        postgresql_using="gist",
+    )
+
+
+class TableVersion(db.Model):
+    # One row per table, bumped by a trigger on every write statement.
+    # See conditional.py.
+    __tablename__ = "TableVersion"
+
+    name = db.Column(db.String(63), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, server_default="0")
+    updated_at = db.Column(
+        db.TIMESTAMP(),
+        nullable=False,
+        server_default=db.text("timezone('utc', now())"),
     )
 
 
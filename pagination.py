@@ -0,0 +1,122 @@
+# Keyset (cursor) pagination for the listing pages.
+# A page is fetched with `WHERE (k1, k2, ...) > (:v1, :v2, ...) ORDER BY k1, k2, ... LIMIT n`
+# so its cost does not depend on how deep into the listing the client is.
+import base64
+import datetime
+import json
+from collections import namedtuple
+
+from flask import current_app, request, url_for
+from sqlalchemy import literal, tuple_
+
+
+Page = namedtuple("Page", ["items", "next_cursor", "prev_cursor"])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [_encode_value(v) for v in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _is_valid_value(key, value):
+    if value is None:
+        return key.expression.nullable
+    # Exact types: a bool is an int, but would not make a valid id.
+    return type(value) is key.type.python_type
+
+
+def decode_cursor(cursor, keys):
+    # The direction and key values of `cursor`, which come from the client: a
+    # value of the wrong type would only fail in the database.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in values]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+    if direction not in ("next", "prev") or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    if not all(_is_valid_value(k, v) for k, v in zip(keys, values)):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def get_page_size(args=None):
+    # Page size comes from config, and may be lowered (or raised up to the
+    # configured maximum) with ?per_page=.
+    if args is None:
+        args = request.args
+    default = current_app.config.get("LISTING_PAGE_SIZE", 50)
+    maximum = current_app.config.get("LISTING_MAX_PAGE_SIZE", 500)
+    page_size = args.get("per_page", default, type=int)
+    return max(1, min(page_size, maximum))
+
+
+def keyset_query(query, keys, values=None, backwards=False, limit=50):
+    # Rows strictly after (or before, when going backwards) the `values` key.
+    if values is not None:
+        key_tuple = tuple_(*keys)
+        bound = tuple_(*[literal(v, k.type) for k, v in zip(keys, values)])
+        query = query.filter(key_tuple < bound if backwards else key_tuple > bound)
+    order_by = [k.desc() if backwards else k.asc() for k in keys]
+    return query.order_by(*order_by).limit(limit)
+
+
+PageQuery = namedtuple(
+    "PageQuery", ["query", "keys", "direction", "values", "page_size"]
+)
+
+
+def page_query(query, keys, cursor=None, page_size=50):
+    # `keys` are the columns that totally order the listing (the last one must
+    # be unique, e.g. the primary key). Rows must expose each key under its
+    # column key so that the boundary values can be read back from them.
+    direction, values = "next", None
+    if cursor:
+        direction, values = decode_cursor(cursor, keys)
+    # Fetch one extra row to know whether there is a page beyond this one.
+    query = keyset_query(query, keys, values, direction == "prev", page_size + 1)
+    return PageQuery(query, keys, direction, values, page_size)
+
+
+def make_page(page_query, rows):
+    # The page out of the `rows` fetched with `page_query`.
+    backwards = page_query.direction == "prev"
+    has_more = len(rows) > page_query.page_size
+    rows = rows[: page_query.page_size]
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else page_query.values is not None
+    key_names = [k.key for k in page_query.keys]
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor("next", [getattr(rows[-1], n) for n in key_names])
+    if rows and has_prev:
+        prev_cursor = encode_cursor("prev", [getattr(rows[0], n) for n in key_names])
+    return Page(rows, next_cursor, prev_cursor)
+
+
+def url_for_page(cursor):
+    # URL of the current listing at another cursor, keeping the other query args.
+    # Repeated args (e.g. ?genre=) are kept whole.
+    args = request.args.to_dict(flat=False)
+    args["cursor"] = cursor
+    return url_for(request.endpoint, **args)
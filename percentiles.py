@@ -0,0 +1,12 @@
+# Latency percentiles, as reported by benchmark.py and loadtest.py.
+# Nearest-rank: the p-th percentile is a measured value, the smallest one which
+# at least p% of the values do not exceed.
+import math
+
+
+def percentiles(values, ps):
+    # The percentiles `ps` (0-100) of `values`, in any order, sorted once.
+    values = sorted(values)
+    if not values:
+        return [float("nan")] * len(ps)
+    return [values[max(0, math.ceil(p / 100 * len(values)) - 1)] for p in ps]
@@ -0,0 +1,174 @@
+# Plan regression check for the hot queries of the app.
+# Every query below is EXPLAINed against the configured database with
+# enable_seqscan turned off, so that the planner answers the same on a handful
+# of seeded rows as on a production-sized catalog. A query fails the check when
+# its plan scans one of our tables sequentially, or when it does not use the
+# index the query was designed for (the planner otherwise happily falls back
+# to walking an unrelated index end to end).
+#
+#   $ FLASK_APP=app.py flask check-plans
+#
+# exits with a non-zero status on any failure; tests/test_plans.py runs it on a
+# seeded throwaway database. VACUUM ANALYZE after seeding: rows inserted after
+# the GIN indexes were built wait in their pending lists, which the planner
+# costs as a scan of the whole list.
+import datetime
+import json
+
+from models import db, Venue, Artist, Show
+from loaders import (
+    venue_detail_query,
+    venue_shows_query,
+    artist_detail_query,
+    artist_shows_query,
+)
+from listings import (
+    venues_listing_query,
+    artists_listing_query,
+    shows_listing_query,
+    VENUE_LISTING_KEYS,
+    ARTIST_LISTING_KEYS,
+    SHOW_LISTING_KEYS,
+)
+from pagination import keyset_query
+from search import search_query, count_query
+
+
+TABLES = {Venue.__tablename__, Artist.__tablename__, Show.__tablename__}
+
+
+def hot_queries():
+    # (name, query, indexes the plan must use), with representative parameters.
+    nowtime = datetime.datetime.utcnow()
+    return [
+        (
+            "show_venue: venue",
+            venue_detail_query(1, nowtime),
+            {"Venue_pkey", "ix_Show_venue_id_start_time"},
+        ),
+        (
+            "show_venue: shows",
+            venue_shows_query(1, nowtime),
+            {"ix_Show_venue_id_start_time"},
+        ),
+        (
+            "show_artist: artist",
+            artist_detail_query(1, nowtime),
+            {"Artist_pkey", "ix_Show_artist_id_start_time"},
+        ),
+        (
+            "show_artist: shows",
+            artist_shows_query(1, nowtime),
+            {"ix_Show_artist_id_start_time"},
+        ),
+        (
+            "venues: first page",
+            keyset_query(venues_listing_query(), VENUE_LISTING_KEYS),
+            {"ix_Venue_city_state_name_id"},
+        ),
+        (
+            "venues: next page",
+            keyset_query(
+                venues_listing_query(), VENUE_LISTING_KEYS, ["Boston", "MA", "A", 1]
+            ),
+            {"ix_Venue_city_state_name_id"},
+        ),
+        (
+            "artists: first page",
+            keyset_query(artists_listing_query(), ARTIST_LISTING_KEYS),
+            {"ix_Artist_name_id"},
+        ),
+        (
+            "artists: previous page",
+            keyset_query(
+                artists_listing_query(), ARTIST_LISTING_KEYS, ["M", 1], backwards=True
+            ),
+            {"ix_Artist_name_id"},
+        ),
+        (
+            "shows: first page",
+            keyset_query(shows_listing_query(), SHOW_LISTING_KEYS),
+            {"ix_Show_start_time_id"},
+        ),
+        (
+            "shows: next page",
+            keyset_query(shows_listing_query(), SHOW_LISTING_KEYS, [nowtime, 1]),
+            {"ix_Show_start_time_id"},
+        ),
+        (
+            "search_venues",
+            search_query(Venue, "music", 50),
+            {"ix_Venue_name_trgm"},
+        ),
+        # Counts take a selective term: for a common one, the planner rightly
+        # stops walking a covering index after `cap` matches.
+        (
+            "search_venues: count",
+            count_query(Venue, "velvet hall", 1000),
+            {"ix_Venue_name_trgm"},
+        ),
+        (
+            "search_artists",
+            search_query(Artist, "band", 50),
+            {"ix_Artist_name_trgm"},
+        ),
+        (
+            "search_artists: count",
+            count_query(Artist, "howling sax", 1000),
+            {"ix_Artist_name_trgm"},
+        ),
+        (
+            "rollover-shows",
+            db.session.query(Show.id).filter(
+                Show.is_upcoming, Show.start_time <= nowtime
+            ),
+            {"ix_Show_upcoming_start_time"},
+        ),
+    ]
+
+
+def _explain(connection, query):
+    compiled = query.statement.compile(dialect=connection.dialect)
+    sql = "EXPLAIN (FORMAT JSON) " + str(compiled)
+    result = connection.execute(sql, compiled.params).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def plan_problems(plan, expected_indexes):
+    nodes = list(_walk(plan))
+    problems = [
+        f"sequential scan on {node['Relation Name']}"
+        for node in nodes
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in TABLES
+    ]
+    used_indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+    problems.extend(
+        f"{index} not used" for index in sorted(expected_indexes - used_indexes)
+    )
+    return problems
+
+
+def check_plans(queries=None):
+    # Returns a list of (name, [problems]) for every query which is not served
+    # by its indexes.
+    if queries is None:
+        queries = hot_queries()
+    failures = []
+    connection = db.session.connection()
+    connection.execute("SET LOCAL enable_seqscan = off")
+    try:
+        for name, query, expected_indexes in queries:
+            problems = plan_problems(_explain(connection, query), expected_indexes)
+            if problems:
+                failures.append((name, problems))
+    finally:
+        db.session.rollback()
+    return failures
@@ -1,20 +1,268 @@
-# This script populates DB with mock data.
-# This is supporsed to be executed only once on starting development.
+# This script populates DB with synthetic venues, artists and shows.
+#
+#   $ python populate_db.py --venues 20000 --artists 50000 --shows 1000000
+#   $ python populate_db.py --demo
+#
+# Rows come from a seeded random generator, so the same arguments always produce
+# the same catalog, and are written with PostgreSQL COPY in batches of
+# --batch-size rows. Show times are spread around --anchor (today by default):
+# pass it explicitly to reproduce a catalog on another day.
+# --demo inserts the handful of mock rows of the original project instead.
+import argparse
+import csv
+import datetime
+import io
+import random
+import time
+
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from models import Venue, Artist, Show
 
-app = Flask(__name__)
-app.config.from_object("config")
+from forms import VenueForm
+from models import init_db, db, Venue, Artist, Show
 
-db = SQLAlchemy(app)
-Migrate(app, db)
 
+VENUE_COLUMNS = [
+    "id",
+    "name",
+    "city",
+    "state",
+    "address",
+    "phone",
+    "genres",
+    "website",
+    "facebook_link",
+    "seeking_talent",
+    "seeking_description",
+    "image_link",
+]
+ARTIST_COLUMNS = [
+    "id",
+    "name",
+    "city",
+    "state",
+    "phone",
+    "genres",
+    "website",
+    "facebook_link",
+    "seeking_venue",
+    "seeking_description",
+    "image_link",
+]
+SHOW_COLUMNS = ["venue_id", "artist_id", "start_time"]
 
-if __name__ == "__main__":
+CITIES = [
+    ("San Francisco", "CA"),
+    ("Los Angeles", "CA"),
+    ("New York", "NY"),
+    ("Brooklyn", "NY"),
+    ("Chicago", "IL"),
+    ("Austin", "TX"),
+    ("Houston", "TX"),
+    ("Seattle", "WA"),
+    ("Portland", "OR"),
+    ("Denver", "CO"),
+    ("Nashville", "TN"),
+    ("New Orleans", "LA"),
+    ("Atlanta", "GA"),
+    ("Boston", "MA"),
+    ("Detroit", "MI"),
+    ("Minneapolis", "MN"),
+]
+ADJECTIVES = [
+    "Velvet",
+    "Electric",
+    "Golden",
+    "Blue",
+    "Crimson",
+    "Wild",
+    "Midnight",
+    "Rusty",
+    "Silver",
+    "Dusty",
+    "Neon",
+    "Lonesome",
+    "Dueling",
+    "Musical",
+    "Howling",
+    "Broken",
+]
+VENUE_NOUNS = ["Hall", "Lounge", "Room", "Tavern", "Club", "Bar", "Theater", "Garden"]
+ARTIST_NOUNS = ["Band", "Pianos", "Petals", "Sax", "Trio", "Quartet", "Kings", "Echoes"]
+STREETS = [
+    "Main Street",
+    "Folsom Street",
+    "Delancey Street",
+    "Market Street",
+    "Oak Ave",
+]
+
+# Shows fall on the half hour within this many days around the anchor.
+SHOW_SPAN_DAYS = 365
+
+
+def _array(values):
+    return "{" + ",".join(f'"{v}"' for v in values) + "}"
+
+
+def _bool(value):
+    return "t" if value else "f"
+
+
+def _phone(entity_id):
+    # Unique per row, as the column is.
+    digits = f"{entity_id:010d}"
+    return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+
+
+def _genres(rng):
+    return _array(rng.sample(VenueForm.genres_choices, rng.randint(1, 3)))
+
+
+def venue_rows(rng, venue_ids):
+    for venue_id in venue_ids:
+        city, state = rng.choice(CITIES)
+        seeking_talent = rng.random() < 0.3
+        yield (
+            venue_id,
+            f"The {rng.choice(ADJECTIVES)} {rng.choice(VENUE_NOUNS)}",
+            city,
+            state,
+            f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            _phone(venue_id),
+            _genres(rng),
+            f"https://venue{venue_id}.example.com",
+            f"https://www.facebook.com/venue{venue_id}",
+            _bool(seeking_talent),
+            "Looking for local artists." if seeking_talent else None,
+            f"https://picsum.photos/seed/venue{venue_id}/400/300",
+        )
+
+
+def artist_rows(rng, artist_ids):
+    for artist_id in artist_ids:
+        city, state = rng.choice(CITIES)
+        seeking_venue = rng.random() < 0.3
+        yield (
+            artist_id,
+            f"The {rng.choice(ADJECTIVES)} {rng.choice(ARTIST_NOUNS)}",
+            city,
+            state,
+            _phone(artist_id),
+            _genres(rng),
+            f"https://artist{artist_id}.example.com",
+            f"https://www.facebook.com/artist{artist_id}",
+            _bool(seeking_venue),
+            "Looking for venues to play at." if seeking_venue else None,
+            f"https://picsum.photos/seed/artist{artist_id}/300/300",
+        )
+
+
+def show_rows(rng, venue_ids, artist_ids, count, anchor):
+    # Squaring the draw skews shows towards the first venues and artists, so the
+    # catalog has a few very busy pages as well as a long tail.
+    first_slot = anchor - datetime.timedelta(days=SHOW_SPAN_DAYS)
+    slots = [
+        (first_slot + datetime.timedelta(minutes=30 * i)).isoformat()
+        for i in range(2 * SHOW_SPAN_DAYS * 48)
+    ]
+    n_venues, n_artists = len(venue_ids), len(artist_ids)
+    draw = rng.random
+    for _ in range(count):
+        yield (
+            venue_ids[int(n_venues * draw() ** 2)],
+            artist_ids[int(n_artists * draw() ** 2)],
+            slots[int(len(slots) * draw())],
+        )
+
+
+def _reserve_ids(cursor, table, count):
+    # Advances the id sequence of `table` past `count` ids and returns them, so
+    # that shows can reference rows before they are written. Seeding is not
+    # meant to run alongside other writers.
+    if not count:
+        return range(0)
+    cursor.execute(
+        "SELECT setval(pg_get_serial_sequence(%(table)s, 'id'),"
+        " nextval(pg_get_serial_sequence(%(table)s, 'id')) + %(count)s - 1)",
+        {"table": f'"{table}"', "count": count},
+    )
+    last_id = cursor.fetchone()[0]
+    return range(last_id - count + 1, last_id + 1)
 
-    venue_data1 = {
+
+def copy_rows(cursor, table, columns, rows, batch_size):
+    sql = f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    n_rows = 0
+    while True:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        batch = 0
+        for row in rows:
+            writer.writerow(row)
+            batch += 1
+            if batch == batch_size:
+                break
+        if not batch:
+            return n_rows
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        n_rows += batch
+
+
+def seed_catalog(
+    session,
+    n_venues,
+    n_artists,
+    n_shows,
+    seed=0,
+    anchor=None,
+    batch_size=10000,
+    truncate=False,
+):
+    # Writes the synthetic catalog in the session's transaction; the caller
+    # commits.
+    if anchor is None:
+        anchor = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    if n_shows and not (n_venues and n_artists):
+        raise ValueError("shows need at least one venue and one artist")
+    rng = random.Random(seed)
+    cursor = session.connection().connection.cursor()
+    # Loading millions of rows is expected to take longer than a web request.
+    cursor.execute("SET LOCAL statement_timeout = 0")
+    if truncate:
+        cursor.execute('TRUNCATE "Show", "Venue", "Artist" RESTART IDENTITY CASCADE')
+
+    venue_ids = _reserve_ids(cursor, Venue.__tablename__, n_venues)
+    copy_rows(
+        cursor,
+        Venue.__tablename__,
+        VENUE_COLUMNS,
+        venue_rows(rng, venue_ids),
+        batch_size,
+    )
+    artist_ids = _reserve_ids(cursor, Artist.__tablename__, n_artists)
+    copy_rows(
+        cursor,
+        Artist.__tablename__,
+        ARTIST_COLUMNS,
+        artist_rows(rng, artist_ids),
+        batch_size,
+    )
+    copy_rows(
+        cursor,
+        Show.__tablename__,
+        SHOW_COLUMNS,
+        show_rows(rng, venue_ids, artist_ids, n_shows, anchor),
+        batch_size,
+    )
+    # Fresh statistics, or the planner keeps assuming empty tables.
+    for table in (Venue, Artist, Show):
+        cursor.execute(f'ANALYZE "{table.__tablename__}"')
+    return {"venues": n_venues, "artists": n_artists, "shows": n_shows}
+
+
+DEMO_VENUES = [
+    {
         "id": 1,
         "name": "The Musical Hop",
         "address": "1015 Folsom Street",
@@ -30,8 +278,8 @@ if __name__ == "__main__":
             "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60"
         ),
-    }
-    venue_data2 = {
+    },
+    {
         "id": 2,
         "name": "The Dueling Pianos Bar",
         "genres": ["Classical", "R&B", "Hip-Hop"],
@@ -42,12 +290,13 @@ if __name__ == "__main__":
         "website": "https://www.theduelingpianos.com",
         "facebook_link": "https://www.facebook.com/theduelingpianos",
         "seeking_talent": False,
+        "seeking_description": None,
         "image_link": (
             "https://images.unsplash.com/photo-1497032205916-ac775f0649ae?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=750&q=80"
         ),
-    }
-    venue_data3 = {
+    },
+    {
         "id": 3,
         "name": "Park Square Live Music & Coffee",
         "genres": ["Rock n Roll", "Jazz", "Classical", "Folk"],
@@ -58,16 +307,15 @@ if __name__ == "__main__":
         "website": "https://www.parksquarelivemusicandcoffee.com",
         "facebook_link": "https://www.facebook.com/ParkSquareLiveMusicAndCoffee",
         "seeking_talent": False,
+        "seeking_description": None,
         "image_link": (
             "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80"
         ),
-    }
-    db.session.add(Venue(**venue_data1))
-    db.session.add(Venue(**venue_data2))
-    db.session.add(Venue(**venue_data3))
-
-    artist_data1 = {
+    },
+]
+DEMO_ARTISTS = [
+    {
         "id": 4,
         "name": "Guns N Petals",
         "genres": ["Rock n Roll"],
@@ -82,69 +330,130 @@ if __name__ == "__main__":
             "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80"
         ),
-    }
-    artist_data2 = {
+    },
+    {
         "id": 5,
         "name": "Matt Quevedo",
         "genres": ["Jazz"],
         "city": "New York",
         "state": "NY",
         "phone": "300-400-5000",
+        "website": None,
         "facebook_link": "https://www.facebook.com/mattquevedo923251523",
         "seeking_venue": False,
+        "seeking_description": None,
         "image_link": (
             "https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80"
         ),
-    }
-    artist_data3 = {
+    },
+    {
         "id": 6,
         "name": "The Wild Sax Band",
         "genres": ["Jazz", "Classical"],
         "city": "San Francisco",
         "state": "CA",
         "phone": "432-325-5432",
+        "website": None,
+        "facebook_link": None,
         "seeking_venue": False,
+        "seeking_description": None,
         "image_link": (
             "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid="
             "eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80"
         ),
-    }
-    db.session.add(Artist(**artist_data1))
-    db.session.add(Artist(**artist_data2))
-    db.session.add(Artist(**artist_data3))
-
-    show_data1 = {
+    },
+]
+DEMO_SHOWS = [
+    {
         "venue_id": 1,
         "artist_id": 4,
-        "start_time": "2019-05-21T21:30:00.000Z",
-    }
-    show_data2 = {
+        "start_time": datetime.datetime(2019, 5, 21, 21, 30),
+    },
+    {
         "venue_id": 3,
         "artist_id": 5,
-        "start_time": "2019-06-15T23:00:00.000Z",
-    }
-    show_data3 = {
-        "venue_id": 3,
-        "artist_id": 6,
-        "start_time": "2035-04-01T20:00:00.000Z",
-    }
-    show_data4 = {
+        "start_time": datetime.datetime(2019, 6, 15, 23, 0),
+    },
+    {"venue_id": 3, "artist_id": 6, "start_time": datetime.datetime(2035, 4, 1, 20, 0)},
+    {"venue_id": 3, "artist_id": 6, "start_time": datetime.datetime(2035, 4, 8, 20, 0)},
+    {
         "venue_id": 3,
         "artist_id": 6,
-        "start_time": "2035-04-08T20:00:00.000Z",
-    }
-    show_data5 = {
-        "venue_id": 3,
-        "artist_id": 6,
-        "start_time": "2035-04-15T20:00:00.000Z",
-    }
-    db.session.add(Show(**show_data1))
-    db.session.add(Show(**show_data2))
-    db.session.add(Show(**show_data3))
-    db.session.add(Show(**show_data4))
-    db.session.add(Show(**show_data5))
+        "start_time": datetime.datetime(2035, 4, 15, 20, 0),
+    },
+]
+
+
+def seed_demo(session):
+    # The demo rows carry explicit ids: move the sequences past them so that
+    # rows created afterwards do not collide.
+    session.execute(Venue.__table__.insert(), DEMO_VENUES)
+    session.execute(Artist.__table__.insert(), DEMO_ARTISTS)
+    session.execute(Show.__table__.insert(), DEMO_SHOWS)
+    for table in (Venue, Artist):
+        session.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table.__tablename__}\"', 'id'),"
+            f' (SELECT max(id) FROM "{table.__tablename__}"))'
+        )
+
 
-    db.session.commit()
+def main():
+    parser = argparse.ArgumentParser(description="Populate the database.")
+    parser.add_argument("--venues", type=int, default=1000)
+    parser.add_argument("--artists", type=int, default=2500)
+    parser.add_argument("--shows", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0, help="random generator seed")
+    parser.add_argument(
+        "--anchor",
+        type=datetime.datetime.fromisoformat,
+        help="date shows are spread around (default: today)",
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="delete every venue, artist and show first",
+    )
+    parser.add_argument(
+        "--demo", action="store_true", help="insert the original mock rows only"
+    )
+    parser.add_argument("--database-url", help="default: SQLALCHEMY_DATABASE_URI")
+    args = parser.parse_args()
 
-    db.session.close()
+    app = Flask(__name__)
+    app.config.from_object("config")
+    app.config["DB_POOL_PROFILE"] = "batch"
+    if args.database_url:
+        app.config["SQLALCHEMY_DATABASE_URI"] = args.database_url
+    init_db(app, migrations=False)
+
+    with app.app_context():
+        started = time.perf_counter()
+        if args.demo:
+            seed_demo(db.session)
+            counts = {
+                "venues": len(DEMO_VENUES),
+                "artists": len(DEMO_ARTISTS),
+                "shows": len(DEMO_SHOWS),
+            }
+        else:
+            counts = seed_catalog(
+                db.session,
+                args.venues,
+                args.artists,
+                args.shows,
+                seed=args.seed,
+                anchor=args.anchor,
+                batch_size=args.batch_size,
+                truncate=args.truncate,
+            )
+        db.session.commit()
+        print(
+            f"Inserted {counts['venues']} venues, {counts['artists']} artists and "
+            f"{counts['shows']} shows in {time.perf_counter() - started:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Read replica routing.
+# Requests with a safe method (GET, HEAD, OPTIONS) read from one of the replicas
+# of SQLALCHEMY_REPLICA_URIS, picked at random among the healthy ones; everything
+# else, and anything run outside of a request (commands, scripts), goes to the
+# primary. Each replica is checked at most every REPLICA_CHECK_INTERVAL seconds
+# and left out while it is unreachable or more than REPLICA_MAX_LAG_SECONDS
+# behind; without a healthy replica, reads go to the primary.
+# Views which only read but are not reached with a safe method (the search forms
+# are POSTed) are marked with @read_only.
+# After a write, the client is sent a cookie that keeps its reads on the primary
+# for REPLICA_STICKY_SECONDS, so that it sees its own changes straight away.
+#
+# Replicas do not need to be streaming replicas: any database with the same
+# schema works (a replica which is not in recovery counts as lag-free), which
+# is how routing is tested locally against two databases.
+import random
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+STICKY_COOKIE = "db_primary"
+
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def replica_binds(app):
+    return [f"replica{i}" for i in range(len(app.config["SQLALCHEMY_REPLICA_URIS"]))]
+
+
+class RoutingSession(SignallingSession):
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        # Flushes write, so they always go to the primary.
+        replica = g.get("db_replica") if has_request_context() else None
+        if replica is not None and not self._flushing:
+            return self.db.get_engine(self.app, bind=replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaMonitor:
+    def __init__(self, db, app):
+        self.db = db
+        self.app = app
+        self.binds = replica_binds(app)
+        self.interval = app.config.get("REPLICA_CHECK_INTERVAL", 5)
+        self.max_lag = app.config.get("REPLICA_MAX_LAG_SECONDS", 5)
+        # bind -> (checked at, lag in seconds or None when unreachable)
+        self.state = {}
+        self._lock = threading.Lock()
+
+    def lag(self, bind):
+        try:
+            with self.db.get_engine(self.app, bind=bind).connect() as connection:
+                return float(connection.execute(LAG_SQL).scalar())
+        except Exception:
+            self.app.logger.exception("Replica %s is unreachable", bind)
+            return None
+
+    def refresh(self):
+        # Only one thread checks; the others use the last known state meanwhile.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            for bind in self.binds:
+                checked_at, _ = self.state.get(bind, (None, None))
+                if checked_at is None or now - checked_at >= self.interval:
+                    self.state[bind] = (now, self.lag(bind))
+        finally:
+            self._lock.release()
+
+    def healthy(self):
+        self.refresh()
+        return [
+            bind
+            for bind in self.binds
+            if bind in self.state
+            and self.state[bind][1] is not None
+            and self.state[bind][1] <= self.max_lag
+        ]
+
+
+def read_only(view):
+    view.db_read_only = True
+    return view
+
+
+def _is_read(request):
+    view = current_app.view_functions.get(request.endpoint)
+    return request.method in SAFE_METHODS or getattr(view, "db_read_only", False)
+
+
+def _route_request():
+    g.db_replica = None
+    if not _is_read(request) or STICKY_COOKIE in request.cookies:
+        return
+    healthy = current_app.extensions["replicas"].healthy()
+    if healthy:
+        g.db_replica = random.choice(healthy)
+
+
+def _stick_to_primary(response):
+    if not _is_read(request):
+        response.set_cookie(
+            STICKY_COOKIE,
+            "1",
+            max_age=current_app.config.get("REPLICA_STICKY_SECONDS", 10),
+            httponly=True,
+        )
+    return response
+
+
+def init_replicas(app, db):
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not uris:
+        return None
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds.update(zip(replica_binds(app), uris))
+    app.config["SQLALCHEMY_BINDS"] = binds
+    monitor = app.extensions["replicas"] = ReplicaMonitor(db, app)
+    app.before_request(_route_request)
+    app.after_request(_stick_to_primary)
+    return monitor
@@ -0,0 +1,79 @@
+# Case-insensitive substring search over venue and artist names.
+# `name ILIKE '%term%'` is served by the pg_trgm GIN indexes on the name
+# columns, results are ranked by trigram similarity and the total is only
+# counted up to a cap, so a search never has to walk the whole table.
+# Results can be narrowed to the rows having all of `genres` (see genres.py).
+from collections import namedtuple
+
+from flask import current_app
+
+from counters import num_upcoming_shows
+from genres import filter_by_genres
+from models import db
+
+
+SearchResult = namedtuple("SearchResult", ["count", "count_capped", "rows"])
+
+
+def _like_pattern(search_term):
+    # Escape LIKE wildcards so that user input only ever matches literally.
+    escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _matches(model, search_term):
+    return model.name.ilike(_like_pattern(search_term), escape="\\")
+
+
+def search_query(model, search_term, limit, columns=None, genres=()):
+    if columns is None:
+        columns = [model.id, model.name, num_upcoming_shows(model)]
+    query = db.session.query(*columns).filter(_matches(model, search_term))
+    query = filter_by_genres(query, model, genres)
+    if search_term:
+        query = query.order_by(
+            db.func.similarity(model.name, search_term).desc(), model.name, model.id
+        )
+    else:
+        query = query.order_by(model.name, model.id)
+    return query.limit(limit)
+
+
+def count_query(model, search_term, cap, genres=()):
+    # Counting stops after `cap` matches; the page then shows "cap+".
+    matches = (
+        filter_by_genres(
+            db.session.query(model.id).filter(_matches(model, search_term)),
+            model,
+            genres,
+        )
+        .limit(cap + 1)
+        .subquery()
+    )
+    return db.session.query(db.func.count()).select_from(matches)
+
+
+def search_limits():
+    # How many results a search returns, and up to how many matches it counts.
+    config = current_app.config
+    return config.get("SEARCH_RESULT_LIMIT", 50), config.get("SEARCH_COUNT_CAP", 1000)
+
+
+def needs_count(rows, limit):
+    # With fewer rows than the limit, every match has already been fetched and
+    # there is no need for a second query.
+    return len(rows) >= limit
+
+
+def make_search_result(rows, count, cap):
+    return SearchResult(min(count, cap), count > cap, rows)
+
+
+def search_by_name(model, search_term, columns=None, genres=()):
+    # `columns` default to the id, name and number of upcoming shows.
+    limit, cap = search_limits()
+    rows = search_query(model, search_term, limit, columns, genres).all()
+    count = len(rows)
+    if needs_count(rows, limit):
+        count = count_query(model, search_term, cap, genres).scalar()
+    return make_search_result(rows, count, cap)
@@ -0,0 +1,143 @@
+# Cold start benchmark. Each run starts a fresh interpreter and times, in turn:
+# importing the app module, creating the app and serving its first page (the
+# home page, which needs no database). These are what every worker, command and
+# test run pays before doing any work.
+#
+#   $ python startup_benchmark.py --runs 20 --output startup.json
+#   $ python startup_benchmark.py --baseline startup.json
+#   $ python startup_benchmark.py --top 15
+#
+# With --top, also lists the modules slowest to import, from `python -X importtime`.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+PHASES = ("import", "create_app", "first_request")
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get("/")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": served - created,
+}))
+"""
+
+
+def _run(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=here,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def measure(runs):
+    timings = {phase: [] for phase in PHASES}
+    for _ in range(runs):
+        result = json.loads(_run(["-c", CHILD]).stdout.splitlines()[-1])
+        for phase in PHASES:
+            timings[phase].append(result[phase] * 1000)
+        timings.setdefault("total", []).append(
+            sum(result[phase] for phase in PHASES) * 1000
+        )
+    results = {}
+    for phase, values in timings.items():
+        results[phase] = {
+            "min_ms": round(min(values), 1),
+            "median_ms": round(statistics.median(values), 1),
+            "max_ms": round(max(values), 1),
+        }
+        print(
+            f"  {phase:<14} min {results[phase]['min_ms']:>8.1f} ms"
+            f"  median {results[phase]['median_ms']:>8.1f} ms"
+            f"  max {results[phase]['max_ms']:>8.1f} ms"
+        )
+    return results
+
+
+def slowest_imports(top):
+    # `-X importtime` writes "import time: self | cumulative | module" lines,
+    # children before their parent, indented by two spaces per level.
+    stderr = _run(["-X", "importtime", "-c", "import app"]).stderr
+    children = []
+    for line in stderr.splitlines():
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = fields
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 0:
+            if name.strip() == "app":
+                break
+            children = []
+        elif level == 1:
+            children.append((int(cumulative_us), int(self_us), name.strip()))
+    print("\nSlowest imports of the app module (cumulative / self):")
+    for cumulative_us, self_us, name in sorted(children, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:>8.1f} ms {self_us / 1000:>8.1f} ms  {name}")
+
+
+def compare(results, baseline):
+    print("\nComparison with baseline (median):")
+    for phase, r in results.items():
+        b = baseline.get("results", {}).get(phase)
+        if b is None:
+            continue
+        delta = (r["median_ms"] - b["median_ms"]) / b["median_ms"] * 100
+        print(
+            f"  {phase:<14} {b['median_ms']:>8.1f} ms -> {r['median_ms']:>8.1f} ms"
+            f"  {delta:+.0f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the app.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this previous JSON output")
+    args = parser.parse_args()
+
+    print(f"Cold start over {args.runs} runs:")
+    results = measure(args.runs)
+    if args.top:
+        slowest_imports(args.top)
+
+    output = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "runs": args.runs,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Tests run against a throwaway PostgreSQL database, created for the session
+# on the server of TEST_DATABASE_URL (default: SQLALCHEMY_DATABASE_URI) and
+# dropped at the end. It is built by the migrations, so it has the extensions,
+# indexes and triggers of production, and seeded with a synthetic catalog (see
+# populate_db.py) large enough for the planner to prefer the indexes the hot
+# queries were designed for over walking a small table.
+#
+#   $ TEST_DATABASE_URL=postgresql://postgres@localhost:5432/postgres python -m pytest
+#
+# The tests are skipped when the server cannot be reached.
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine.url import make_url
+
+import config
+from app import create_app
+from models import db
+from populate_db import seed_catalog
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def throwaway_database():
+    # The URL of a new database, dropped on exit.
+    server_url = os.environ.get("TEST_DATABASE_URL", config.SQLALCHEMY_DATABASE_URI)
+    # CREATE DATABASE cannot run in a transaction.
+    maintenance_url = make_url(server_url)
+    maintenance_url.database = "postgres"
+    engine = create_engine(maintenance_url, isolation_level="AUTOCOMMIT")
+    name = f"fyyur_test_{uuid.uuid4().hex[:12]}"
+    try:
+        engine.execute(f'CREATE DATABASE "{name}"')
+    except OperationalError as error:
+        engine.dispose()
+        pytest.skip(f"PostgreSQL is not reachable: {error.orig}")
+    url = make_url(server_url)
+    url.database = name
+    try:
+        yield str(url)
+    finally:
+        engine.execute(f'DROP DATABASE "{name}"')
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    with throwaway_database() as url:
+        yield url
+
+
+@pytest.fixture(scope="session")
+def app(database_url):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+        },
+        migrations=True,
+    )
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+        seed_catalog(db.session, 5000, 12500, 50000)
+        db.session.commit()
+        # VACUUM cannot run in a transaction either.
+        with db.engine.connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+                "VACUUM ANALYZE"
+            )
+    yield app
+    # Close the connections of the pool, or the database cannot be dropped.
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+        db.session.remove()
+
+
+@pytest.fixture(scope="session")
+def replica_url(app):
+    # A second database with the schema of the first, left empty, standing for
+    # a replica (see routing.py).
+    with throwaway_database() as url:
+        replica = create_app({"SQLALCHEMY_DATABASE_URI": url}, migrations=True)
+        with replica.app_context():
+            upgrade(directory=os.path.join(ROOT, "migrations"))
+            db.session.remove()
+            db.engine.dispose()
+        yield url
@@ -0,0 +1,38 @@
+# JSON API; see api.py.
+
+
+def test_listings_and_searches_return_the_counters(client):
+    venues = client.get("/api/v1/venues").get_json()["data"]
+    assert "num_upcoming_shows" in venues[0]
+    artists = client.get("/api/v1/artists/search?q=howling").get_json()["data"]
+    assert set(artists[0]) == {"id", "name", "num_upcoming_shows"}
+
+
+def test_details_count_upcoming_shows(client):
+    venue = client.get("/api/v1/venues/1").get_json()
+    assert "upcoming_shows_count" in venue
+    assert "num_upcoming_shows" not in venue
+
+
+def test_fields_are_selected(client):
+    body = client.get("/api/v1/venues?fields=name&per_page=5").get_json()
+    assert [set(venue) for venue in body["data"]] == [{"name"}] * 5
+    # The pagination keys are still read to build the cursors.
+    body = client.get(
+        "/api/v1/venues", query_string={"fields": "id", "cursor": body["next_cursor"]}
+    ).get_json()
+    assert body["data"] and set(body["data"][0]) == {"id"}
+
+
+def test_detail_shows_are_only_returned_when_asked_for(client):
+    venue = client.get("/api/v1/venues/1?fields=name").get_json()
+    assert venue == {"name": venue["name"]}
+    venue = client.get("/api/v1/venues/1?fields=id,upcoming_shows").get_json()
+    assert set(venue) == {"id", "upcoming_shows"}
+    assert isinstance(venue["upcoming_shows"], list)
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/v1/artists?fields=id,password")
+    assert response.status_code == 400
+    assert "password" in response.get_json()["error"]
@@ -0,0 +1,74 @@
+# Response compression; see compression.py.
+import gzip
+
+import pytest
+
+
+def _get(client, path, encoding, method="GET", **headers):
+    headers["Accept-Encoding"] = encoding
+    return client.open(path, method=method, headers=headers)
+
+
+def test_gzip_is_negotiated(client):
+    plain = client.get("/venues")
+    response = _get(client, "/venues", "gzip, deflate")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert int(response.headers["Content-Length"]) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_brotli_is_preferred(client):
+    brotli = pytest.importorskip("brotli")
+    plain = client.get("/venues")
+    response = _get(client, "/venues", "gzip, br")
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == plain.data
+
+
+@pytest.mark.parametrize("encoding", ["", "identity", "gzip;q=0", "*;q=0", "compress"])
+def test_refused_encodings_are_not_used(client, encoding):
+    response = _get(client, "/venues", encoding)
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+
+
+def test_lower_qualities_are_honoured(client):
+    response = _get(client, "/venues", "br;q=0, gzip;q=0.5")
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_head_requests_are_not_compressed(client):
+    response = _get(client, "/venues", "gzip", method="HEAD")
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == client.get("/venues").headers["ETag"]
+
+
+def test_small_responses_are_sent_as_is(client):
+    response = _get(client, "/api/v1/venues/1?fields=id", "gzip")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"id": 1}
+
+
+def test_compressed_etags_are_weak(client):
+    strong = client.get("/venues").headers["ETag"]
+    response = _get(client, "/venues", "gzip")
+    etag = response.headers["ETag"]
+    assert etag == "W/" + strong
+
+    # Revalidations with the weak ETag keep it, compressed or not.
+    response = _get(client, "/venues", "gzip", **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    response = _get(client, "/venues", "", **{"If-None-Match": strong})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == strong
+
+
+def test_streamed_responses_are_compressed_on_the_fly(client):
+    plain = client.get("/shows.csv")
+    response = _get(client, "/shows.csv", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data) == plain.data
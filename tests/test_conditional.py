@@ -0,0 +1,38 @@
+# Conditional GET of the read routes; see conditional.py.
+from models import db
+
+
+def test_pages_do_not_vary_on_the_cookie(client):
+    with client.session_transaction() as session:
+        session["seen"] = True
+    response = client.get("/venues")
+    assert response.status_code == 200
+    assert "Cookie" not in response.vary
+
+
+def test_pages_are_revalidated_with_their_etag(app, client):
+    response = client.get("/venues")
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+
+    response = client.get("/venues", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    # As sent back by a client which received the page compressed.
+    response = client.get("/venues", headers={"If-None-Match": "W/" + etag})
+    assert response.status_code == 304
+
+    with app.app_context():
+        db.session.execute('UPDATE "Venue" SET website = NULL WHERE id = 1')
+        db.session.commit()
+        db.session.remove()
+    response = client.get("/venues", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_if_modified_since_alone_renders_the_page(client):
+    response = client.get(
+        "/venues", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
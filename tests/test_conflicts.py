@@ -0,0 +1,75 @@
+# Double-booking detection; see conflicts.py.
+import datetime
+import logging
+
+from conflicts import Slot, find_conflicts
+from models import db, Show
+
+
+START = datetime.datetime(2099, 1, 1, 20)
+
+
+def _book(venue_id, artist_id, start_time, duration_minutes=120):
+    show = Show(
+        venue_id=venue_id,
+        artist_id=artist_id,
+        start_time=start_time,
+        duration_minutes=duration_minutes,
+    )
+    db.session.add(show)
+    db.session.commit()
+    return show.id
+
+
+def test_overlapping_slots_conflict(app_context):
+    show_id = _book(4981, 12481, START)
+    conflicts = find_conflicts(
+        [
+            Slot(4981, 12482, START + datetime.timedelta(hours=1), 60),
+            Slot(4982, 12481, START - datetime.timedelta(hours=1), 90),
+            # Slots are half-open: back to back is fine.
+            Slot(4981, 12481, START + datetime.timedelta(hours=2), 60),
+            Slot(4986, 12488, START, 120),
+        ]
+    )
+    assert [(c.position, c.resource, c.show_id) for c in conflicts] == [
+        (0, "venue", show_id),
+        (1, "artist", show_id),
+    ]
+    assert conflicts[0].end_time == START + datetime.timedelta(hours=2)
+
+
+def test_proposed_slots_conflict_with_each_other(app_context):
+    conflicts = find_conflicts(
+        [
+            Slot(4983, 12483, START, 120),
+            Slot(4984, 12483, START + datetime.timedelta(minutes=30), 30),
+        ]
+    )
+    [conflict] = conflicts
+    assert (conflict.position, conflict.resource) == (1, "artist")
+    assert (conflict.show_id, conflict.other_position) == (None, 0)
+
+
+def _submit(client, venue_id, artist_id, start_time):
+    form = {
+        "venue_id": venue_id,
+        "artist_id": artist_id,
+        "start_time": f"{start_time:%Y-%m-%d %H:%M:%S}",
+    }
+    return client.post("/shows/create", data=form).get_data(as_text=True)
+
+
+def test_shows_are_only_listed_when_free(client):
+    assert "Show was successfully listed!" in _submit(client, 4985, 12485, START)
+    html = _submit(client, 4985, 12486, START + datetime.timedelta(minutes=90))
+    assert "Show could not be listed. The venue is already booked from" in html
+
+
+def test_failures_to_list_a_show_are_logged(client, caplog):
+    with caplog.at_level(logging.ERROR):
+        html = _submit(client, 10 ** 9, 12487, START)
+    assert "An error occurred. Show could not be listed." in html
+    [record] = [r for r in caplog.records if r.getMessage().startswith("Could not")]
+    assert "venue_id=1000000000" in record.getMessage()
+    assert record.exc_info is not None
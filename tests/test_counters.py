@@ -0,0 +1,91 @@
+# Upcoming show counters; see counters.py.
+import datetime
+
+from counters import rollover_past_shows
+from models import db, Venue, Artist, Show, TableVersion
+
+
+def _counts(venue_id, artist_id):
+    return (
+        Venue.query.get(venue_id).upcoming_shows_count,
+        Artist.query.get(artist_id).upcoming_shows_count,
+    )
+
+
+def _versions():
+    return dict(db.session.query(TableVersion.name, TableVersion.version))
+
+
+def _add_show(venue_id, artist_id, start_time):
+    show = Show(venue_id=venue_id, artist_id=artist_id, start_time=start_time)
+    db.session.add(show)
+    db.session.commit()
+    return show
+
+
+def test_past_shows_leave_venues_and_artists_alone(app_context):
+    before, versions = _counts(11, 21), _versions()
+    _add_show(11, 21, datetime.datetime(2001, 1, 1, 20))
+    assert _counts(11, 21) == before
+    after = _versions()
+    assert after["Show"] == versions["Show"] + 1
+    assert (after["Venue"], after["Artist"]) == (versions["Venue"], versions["Artist"])
+
+
+def test_counters_follow_upcoming_shows(app_context):
+    start_time = datetime.datetime.utcnow() + datetime.timedelta(days=400)
+    before = _counts(12, 22)
+    show = _add_show(12, 22, start_time)
+    assert _counts(12, 22) == (before[0] + 1, before[1] + 1)
+
+    # Rescheduling an upcoming show moves no counter.
+    versions = _versions()
+    show.start_time = start_time + datetime.timedelta(days=1)
+    db.session.commit()
+    assert _counts(12, 22) == (before[0] + 1, before[1] + 1)
+    assert _versions()["Venue"] == versions["Venue"]
+
+    # Moving it to another venue does.
+    other = _counts(13, 22)
+    show.venue_id = 13
+    db.session.commit()
+    assert _counts(12, 22) == (before[0], before[1] + 1)
+    assert _counts(13, 22) == (other[0] + 1, other[1])
+
+    db.session.delete(show)
+    db.session.commit()
+    assert _counts(13, 22) == (other[0], other[1] - 1)
+
+
+def test_rollover_decrements_the_counters(app_context):
+    show = _add_show(14, 24, datetime.datetime.utcnow() + datetime.timedelta(days=400))
+    before = _counts(14, 24)
+    # As if the show had started: is_upcoming is only set from start_time.
+    db.session.execute(
+        'ALTER TABLE "Show" DISABLE TRIGGER show_set_is_upcoming;'
+        "UPDATE \"Show\" SET start_time = start_time - interval '800 days'"
+        " WHERE id = :id;"
+        'ALTER TABLE "Show" ENABLE TRIGGER show_set_is_upcoming',
+        {"id": show.id},
+    )
+    db.session.commit()
+    assert rollover_past_shows() >= 1
+    assert _counts(14, 24) == (before[0] - 1, before[1] - 1)
+
+
+def test_rollover_without_past_shows_writes_nothing(app_context):
+    rollover_past_shows()
+    versions = _versions()
+    assert rollover_past_shows() == 0
+    assert _versions() == versions
+
+
+def test_statements_touching_no_row_keep_the_versions(app_context):
+    versions = _versions()
+    db.session.execute('UPDATE "Venue" SET name = name WHERE id = -1')
+    db.session.execute('DELETE FROM "Show" WHERE id = -1')
+    db.session.commit()
+    assert _versions() == versions
+    db.session.execute('UPDATE "Venue" SET name = name WHERE id = 1')
+    db.session.commit()
+    assert _versions()["Venue"] == versions["Venue"] + 1
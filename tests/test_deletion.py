@@ -0,0 +1,67 @@
+# Deleting venues and artists; see deletion.py.
+import pytest
+
+from models import db, Venue, Artist, Show
+
+
+def _exists(model, ids):
+    return sorted(id for id, in db.session.query(model.id).filter(model.id.in_(ids)))
+
+
+def _show_count(column, ids):
+    return db.session.query(Show).filter(column.in_(ids)).count()
+
+
+def test_venues_are_deleted_with_their_shows(app, client):
+    ids = [4991, 4992]
+    with app.app_context():
+        assert _show_count(Show.venue_id, ids) > 0
+    response = client.delete("/api/v1/venues", json={"ids": ids + [4991, 10 ** 9]})
+    assert response.status_code == 200
+    assert response.get_json() == {"deleted": ids}
+    with app.app_context():
+        assert _exists(Venue, ids) == []
+        assert _show_count(Show.venue_id, ids) == 0
+        db.session.remove()
+
+    # Deleting them again deletes nothing.
+    response = client.delete("/api/v1/venues", json={"ids": ids})
+    assert response.get_json() == {"deleted": []}
+
+
+def test_artists_are_deleted_from_their_page(app, client):
+    with app.app_context():
+        name = Artist.query.get(12491).name
+        db.session.remove()
+    response = client.delete("/artists/12491")
+    assert f"Artist {name} has successfully been deleted!" in response.get_data(
+        as_text=True
+    )
+    with app.app_context():
+        assert _exists(Artist, [12491]) == []
+        assert _show_count(Show.artist_id, [12491]) == 0
+        db.session.remove()
+
+    response = client.delete("/artists/12491")
+    assert "Artist could not be deleted." in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        None,
+        [1],
+        {"ids": []},
+        {"ids": 1},
+        {"ids": ["1"]},
+        {"ids": [1.0]},
+        {"ids": [True]},
+        {"ids": list(range(1, 1002))},
+    ],
+)
+def test_invalid_ids_are_rejected(app, client, body):
+    response = client.delete("/api/v1/artists", json=body)
+    assert response.status_code == 400
+    with app.app_context():
+        assert _exists(Artist, [1]) == [1]
+        db.session.remove()
@@ -0,0 +1,57 @@
+# Cached listing tiles; see fragments.py.
+import re
+
+from models import db
+
+
+def _render(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def _write(app, statement, **params):
+    # A write made outside the views, as by an import or another worker.
+    with app.app_context():
+        db.session.execute(statement, params)
+        db.session.commit()
+        db.session.remove()
+
+
+def test_a_write_only_invalidates_the_tiles_of_its_row(app, client):
+    cache = app.jinja_env.fragment_cache
+    cache.clear()
+    html = _render(client, "/venues")
+    venue_ids = re.findall(r'data-id="(\d+)"', html)
+    assert len(venue_ids) > 1
+
+    _write(
+        app,
+        'UPDATE "Venue" SET website = :url WHERE id = :id',
+        url="http://a.example",
+        id=int(venue_ids[0]),
+    )
+    hits, misses = cache.hits, cache.misses
+    _render(client, "/venues")
+    assert cache.misses - misses == 1
+    assert cache.hits - hits == len(venue_ids) - 1
+
+
+def test_tiles_show_the_rows_they_render(app, client):
+    cache = app.jinja_env.fragment_cache
+    cache.clear()
+    html = _render(client, "/shows")
+    n_tiles = html.count("tile-show")
+    artist_ids = re.findall(r'href="/artists/(\d+)"', html)
+    artist_id = int(artist_ids[0])
+    n_renamed = artist_ids.count(str(artist_id))
+
+    name = f"Renamed artist {artist_id}"
+    _write(
+        app, 'UPDATE "Artist" SET name = :name WHERE id = :id', name=name, id=artist_id
+    )
+    hits, misses = cache.hits, cache.misses
+    html = _render(client, "/shows")
+    assert html.count(name) == n_renamed
+    assert cache.misses - misses == n_renamed
+    assert cache.hits - hits == n_tiles - n_renamed
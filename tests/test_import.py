@@ -0,0 +1,40 @@
+# Bulk imports; see importer.py.
+import io
+
+import pytest
+
+from app import UploadRequest
+from models import Venue
+
+
+VENUES_CSV = """name,city,state,address,phone,genres
+The {0} Hall,Austin,TX,1 Main Street,{1}-0001,"Jazz,Folk"
+The {0} Room,Austin,TX,2 Main Street,{1}-0002,Blues
+"""
+
+
+# Small uploads are kept in memory, larger ones written to a temporary file.
+@pytest.mark.parametrize(
+    "name, phone_prefix, max_spooled_size",
+    [("Memory", "555-010", None), ("Disk", "555-020", 0)],
+)
+def test_import_csv_uploaded_as_multipart(
+    app, client, monkeypatch, name, phone_prefix, max_spooled_size
+):
+    if max_spooled_size is not None:
+        monkeypatch.setattr(UploadRequest, "max_spooled_size", max_spooled_size)
+    feed = VENUES_CSV.format(name, phone_prefix)
+    # As sent by `curl -F file=@venues.csv`.
+    response = client.post(
+        "/import/venues",
+        data={"file": (io.BytesIO(feed.encode()), "venues.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert response.get_json()["inserted"] == 2
+    with app.app_context():
+        venues = Venue.query.filter(Venue.name.like(f"The {name} %"))
+        assert {(v.name, tuple(v.genres)) for v in venues} == {
+            (f"The {name} Hall", ("Jazz", "Folk")),
+            (f"The {name} Room", ("Blues",)),
+        }
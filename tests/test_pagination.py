@@ -0,0 +1,61 @@
+# Keyset pagination of the listings; see pagination.py.
+import base64
+import datetime
+import json
+
+import pytest
+
+from listings import SHOW_LISTING_KEYS, VENUE_LISTING_KEYS
+from pagination import decode_cursor, encode_cursor, InvalidCursor
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_cursors_round_trip():
+    values = [datetime.datetime(2026, 10, 19, 20, 30), 42]
+    cursor = encode_cursor("prev", values)
+    assert decode_cursor(cursor, SHOW_LISTING_KEYS) == ("prev", values)
+    values = ["Austin", "TX", "The Silver Room", 7]
+    cursor = encode_cursor("next", values)
+    assert decode_cursor(cursor, VENUE_LISTING_KEYS) == ("next", values)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        _raw_cursor({"next": [1]})[:-2],
+        _raw_cursor(["sideways", [{"dt": "2026-10-19T20:30:00"}, 42]]),
+        _raw_cursor(["next", [{"dt": "2026-10-19T20:30:00"}]]),
+        _raw_cursor(["next", [{"dt": "yesterday"}, 42]]),
+        _raw_cursor(["next", [{"dt": "2026-10-19T20:30:00"}, "42"]]),
+        _raw_cursor(["next", [{"dt": "2026-10-19T20:30:00"}, True]]),
+        _raw_cursor(["next", [None, 42]]),
+    ],
+)
+def test_tampered_cursors_are_rejected(client, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, SHOW_LISTING_KEYS)
+    for path in ("/api/v1/shows", "/shows"):
+        assert client.get(path, query_string={"cursor": cursor}).status_code == 400
+
+
+def _ids(client, **args):
+    body = client.get("/api/v1/shows", query_string=dict(args, per_page=20)).get_json()
+    return [show["id"] for show in body["data"]], body
+
+
+def test_pages_chain_both_ways(client):
+    first, body = _ids(client)
+    assert body["prev_cursor"] is None
+    second, body = _ids(client, cursor=body["next_cursor"])
+    third, body = _ids(client, cursor=body["next_cursor"])
+    assert len(set(first + second + third)) == 60
+
+    back, body = _ids(client, cursor=body["prev_cursor"])
+    assert back == second
+    back, body = _ids(client, cursor=body["prev_cursor"])
+    assert back == first
+    assert body["prev_cursor"] is None
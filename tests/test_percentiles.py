@@ -0,0 +1,14 @@
+# Latency percentiles of the benchmarks; see percentiles.py.
+import math
+
+from percentiles import percentiles
+
+
+def test_percentiles_are_nearest_rank():
+    values = list(range(100, 0, -1))
+    assert percentiles(values, [0, 50, 90, 99, 100]) == [1, 50, 90, 99, 100]
+    assert percentiles([0.3, 0.1, 0.2], [50, 95]) == [0.2, 0.3]
+
+
+def test_percentiles_of_nothing_are_nan():
+    assert all(math.isnan(p) for p in percentiles([], [50, 99]))
@@ -0,0 +1,7 @@
+# The hot queries must stay served by their indexes; see plancheck.py.
+from plancheck import check_plans
+
+
+def test_hot_queries_use_their_indexes(app):
+    with app.app_context():
+        assert check_plans() == []
@@ -0,0 +1,94 @@
+# Read replica routing; see routing.py.
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from models import db
+from routing import ReplicaMonitor, STICKY_COOKIE
+
+
+@pytest.fixture(scope="module")
+def routed_app(database_url, replica_url):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "SQLALCHEMY_REPLICA_URIS": [replica_url],
+            "REPLICA_CHECK_INTERVAL": 0,
+            "TESTING": True,
+        }
+    )
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.get_engine(app).dispose()
+        db.get_engine(app, bind="replica0").dispose()
+
+
+@pytest.fixture
+def databases(routed_app):
+    # The databases the statements of the test ran on, in order, leaving out
+    # the replica health checks.
+    used = []
+    with routed_app.app_context():
+        engines = {
+            "primary": db.get_engine(routed_app),
+            "replica": db.get_engine(routed_app, bind="replica0"),
+        }
+
+    def listener(name):
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "pg_is_in_recovery" not in statement:
+                used.append(name)
+
+        return record
+
+    listeners = [(engine, listener(name)) for name, engine in engines.items()]
+    for engine, record in listeners:
+        event.listen(engine, "before_cursor_execute", record)
+    yield used
+    for engine, record in listeners:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_reads_go_to_the_replica(routed_app, databases):
+    response = routed_app.test_client().get("/api/v1/venues")
+    assert response.status_code == 200
+    assert response.get_json()["data"] == []
+    assert databases and set(databases) == {"replica"}
+
+
+def test_writes_go_to_the_primary(routed_app, databases):
+    client = routed_app.test_client()
+    response = client.delete("/api/v1/venues", json={"ids": [10 ** 9]})
+    assert response.status_code == 200
+    assert databases and set(databases) == {"primary"}
+    assert STICKY_COOKIE in response.headers["Set-Cookie"]
+
+
+def test_flushes_go_to_the_primary(routed_app):
+    with routed_app.test_request_context("/venues"):
+        routed_app.preprocess_request()
+        session = db.session()
+        assert session.get_bind() is db.get_engine(routed_app, bind="replica0")
+        session._flushing = True
+        try:
+            assert session.get_bind() is db.get_engine(routed_app)
+        finally:
+            session._flushing = False
+            db.session.remove()
+
+
+def test_writers_read_from_the_primary(routed_app, databases):
+    client = routed_app.test_client()
+    client.delete("/api/v1/venues", json={"ids": [10 ** 9]})
+    del databases[:]
+    response = client.get("/api/v1/venues")
+    assert response.get_json()["data"] != []
+    assert set(databases) == {"primary"}
+
+
+def test_lagging_replicas_are_left_out(routed_app, databases, monkeypatch):
+    monkeypatch.setattr(ReplicaMonitor, "lag", lambda self, bind: 60.0)
+    response = routed_app.test_client().get("/api/v1/venues")
+    assert response.get_json()["data"] != []
+    assert set(databases) == {"primary"}
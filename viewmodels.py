@@ -0,0 +1,122 @@
+# View models of the pages.
+# Pages are rendered from named tuples rather than ORM entities or dicts: they
+# are immutable, so nothing a view or template does can leak into the session's
+# identity map or into another page, and slotted, so a row costs a tuple and no
+# per-instance state. Their rows are read with Core (`fetch_all`), which skips
+# the ORM's per-row result processing.
+from collections import namedtuple
+from itertools import groupby
+from operator import attrgetter, itemgetter
+
+from models import db
+
+
+# Listings and searches.
+VenueListing = namedtuple(
+    "VenueListing", ["id", "name", "city", "state", "num_upcoming_shows", "version"]
+)
+VenueSummary = namedtuple(
+    "VenueSummary", ["id", "name", "num_upcoming_shows", "version"]
+)
+Area = namedtuple("Area", ["city", "state", "venues"])
+ArtistListing = namedtuple("ArtistListing", ["id", "name"])
+ShowListing = namedtuple(
+    "ShowListing",
+    [
+        "id",
+        "start_time",
+        "venue_id",
+        "venue_name",
+        "artist_id",
+        "artist_name",
+        "artist_image_link",
+        "version",
+        "venue_version",
+        "artist_version",
+    ],
+)
+SearchItem = namedtuple("SearchItem", ["id", "name", "num_upcoming_shows"])
+
+# Detail pages.
+VenueShow = namedtuple(
+    "VenueShow", ["artist_id", "artist_name", "artist_image_link", "start_time"]
+)
+ArtistShow = namedtuple(
+    "ArtistShow", ["venue_id", "venue_name", "venue_image_link", "start_time"]
+)
+VenueDetail = namedtuple(
+    "VenueDetail",
+    [
+        "id",
+        "name",
+        "genres",
+        "address",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "seeking_talent",
+        "seeking_description",
+        "image_link",
+        "upcoming_shows_count",
+        "past_shows_count",
+        "upcoming_shows",
+        "past_shows",
+    ],
+)
+ArtistDetail = namedtuple(
+    "ArtistDetail",
+    [
+        "id",
+        "name",
+        "genres",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "seeking_venue",
+        "seeking_description",
+        "image_link",
+        "upcoming_shows_count",
+        "past_shows_count",
+        "upcoming_shows",
+        "past_shows",
+    ],
+)
+
+
+def fetch_all(query):
+    # The rows of an ORM query, run through Core.
+    return db.session.execute(query.statement).fetchall()
+
+
+def build(view_model, rows):
+    # One `view_model` per row, its fields read from the columns of the same name.
+    getter = itemgetter(*view_model._fields)
+    return [view_model._make(getter(row)) for row in rows]
+
+
+def build_detail(view_model, row, upcoming_shows, past_shows):
+    getter = itemgetter(*view_model._fields[:-2])
+    return view_model._make(getter(row) + (tuple(upcoming_shows), tuple(past_shows)))
+
+
+def build_areas(rows):
+    # Venue listing rows, ordered by city and state, grouped into areas.
+    return [
+        Area(
+            city,
+            state,
+            tuple(
+                VenueSummary(r.id, r.name, r.num_upcoming_shows, r.version)
+                for r in group
+            ),
+        )
+        for (city, state), group in groupby(rows, key=attrgetter("city", "state"))
+    ]
+
+
+def search_items(rows):
+    return [SearchItem(row.id, row.name, row.num_upcoming_shows) for row in rows]